@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from .database import db
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_QUEUE_SIZE = int(os.getenv("ACTIVITY_QUEUE_SIZE", "10000"))
+ACTIVITY_BATCH_SIZE = int(os.getenv("ACTIVITY_BATCH_SIZE", "500"))
+ACTIVITY_FLUSH_SECONDS = float(os.getenv("ACTIVITY_FLUSH_SECONDS", "1"))
+# db.activity is TTL-indexed on "at"; see indexes.py
+ACTIVITY_RETENTION_DAYS = int(os.getenv("ACTIVITY_RETENTION_DAYS", "90"))
+
+ISSUE_DIFF_FIELDS = ["title", "description", "status", "assignee"]
+
+def diff(before: dict, after: dict, fields=ISSUE_DIFF_FIELDS) -> dict:
+    return {f: {"old": before.get(f), "new": after.get(f)} for f in fields if before.get(f) != after.get(f)}
+
+class ActivityLog:
+    """Write-behind audit log: requests only enqueue events, a background task
+    persists them with insert_many once ACTIVITY_BATCH_SIZE events are waiting
+    or ACTIVITY_FLUSH_SECONDS have passed."""
+
+    def __init__(self):
+        self.queue = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._task = None
+
+    def record(self, project_id: str, actor: str, action: str, **fields):
+        if self.queue is None:
+            return
+        event = {"project_id": project_id, "at": datetime.utcnow(), "actor": actor, "action": action}
+        event.update((k, v) for k, v in fields.items() if v is not None)
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Never make a request wait on the audit log
+            self.dropped += 1
+
+    async def _write(self, batch: list):
+        try:
+            await db.activity.insert_many(batch, ordered=False)
+            self.written += len(batch)
+        except Exception:
+            self.failed += len(batch)
+            logger.exception("Failed to write %d activity events", len(batch))
+
+    async def _run(self, queue: asyncio.Queue):
+        # None is the shutdown sentinel queued by stop(), behind every pending event
+        while True:
+            event = await queue.get()
+            if event is None:
+                return
+            batch = [event]
+            deadline = time.monotonic() + ACTIVITY_FLUSH_SECONDS
+            while len(batch) < ACTIVITY_BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if event is None:
+                    await self._write(batch)
+                    return
+                batch.append(event)
+            await self._write(batch)
+
+    async def start(self):
+        self.queue = asyncio.Queue(maxsize=ACTIVITY_QUEUE_SIZE)
+        self._task = asyncio.create_task(self._run(self.queue))
+
+    async def stop(self):
+        """Stops accepting events and waits until everything queued is written."""
+        if self._task is None:
+            return
+        queue, self.queue = self.queue, None
+        await queue.put(None)
+        await self._task
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queue.qsize() if self.queue is not None else 0,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+activity_log = ActivityLog()
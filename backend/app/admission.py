@@ -0,0 +1,262 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from prometheus_client import Counter
+
+logger = logging.getLogger(__name__)
+
+# Requests in flight (streams excluded) above which everything is shed with 503
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "1000"))
+# Event-loop lag above which requests matching a rule (auth, writes) are shed, so reads keep working
+ADMISSION_MAX_LAG_MS = float(os.getenv("ADMISSION_MAX_LAG_MS", "200"))
+ADMISSION_LAG_INTERVAL = float(os.getenv("ADMISSION_LAG_INTERVAL", "0.1"))
+ADMISSION_MAX_KEYS = int(os.getenv("ADMISSION_MAX_KEYS", "100000"))
+# SQLite file shared by the workers on one host; unset keeps buckets per process
+ADMISSION_STORE_PATH = os.getenv("ADMISSION_STORE_PATH", "")
+# Use the first X-Forwarded-For address; only behind a proxy that sets it
+ADMISSION_TRUST_FORWARDED = os.getenv("ADMISSION_TRUST_FORWARDED", "0") == "1"
+ADMISSION_MAX_BODY = 64 * 1024
+
+# Per route prefix: methods it covers and [tokens per second, burst] per client IP
+# and per account (the "email" field of the JSON body). Override with a JSON list
+# in ADMISSION_RULES.
+DEFAULT_RULES = [
+    {"name": "login", "prefix": "/auth/login", "methods": ["POST"], "ip": [1, 20], "account": [0.1, 5]},
+    {"name": "register", "prefix": "/auth/register", "methods": ["POST"], "ip": [0.2, 5]},
+    {"name": "forgot_password", "prefix": "/auth/forgot-password", "methods": ["POST"], "ip": [0.2, 5], "account": [0.02, 3]},
+    {"name": "reset_password", "prefix": "/auth/reset-password", "methods": ["POST"], "ip": [0.2, 5]},
+    {"name": "writes", "prefix": "/projects", "methods": ["POST", "PUT", "PATCH", "DELETE"], "ip": [20, 100]},
+]
+EXEMPT_SUFFIXES = ("/stream",)
+
+ADMISSION_DECISIONS = Counter(
+    "sprintium_admission_decisions_total", "Admission control decisions by rule", ["rule", "outcome"],
+)
+
+class Rule:
+    def __init__(self, name: str, prefix: str, methods, ip=None, account=None):
+        self.name = name
+        self.prefix = prefix
+        self.methods = set(methods)
+        self.ip = tuple(ip) if ip else None
+        self.account = tuple(account) if account else None
+
+    def matches(self, method: str, path: str) -> bool:
+        return method in self.methods and path.startswith(self.prefix)
+
+def load_rules():
+    raw = os.getenv("ADMISSION_RULES")
+    return [Rule(**r) for r in (json.loads(raw) if raw else DEFAULT_RULES)]
+
+def _refill(tokens: float, updated: float, now: float, rate: float, burst: float):
+    return min(burst, tokens + (now - updated) * rate)
+
+class MemoryBuckets:
+    """Token buckets for this process, LRU-bounded so address spraying can't grow memory."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        """Takes one token; returns 0 if allowed, else seconds until one is available."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (burst, now))
+        tokens = _refill(tokens, updated, now, rate, burst)
+        allowed = tokens >= 1
+        self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return 0.0 if allowed else (1 - tokens) / rate
+
+    def __len__(self):
+        return len(self._buckets)
+
+class SqliteBuckets:
+    """Token buckets in a SQLite file, so every worker on the host draws from the same bucket."""
+
+    def __init__(self, path: str):
+        self._local = threading.local()
+        self.path = path
+        self.takes = 0
+        # Connections are opened per thread, and not here, so none is carried across a fork
+        conn = sqlite3.connect(path, timeout=1)
+        try:
+            conn.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL, updated REAL)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def _take(self, key: str, rate: float, burst: float) -> float:
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens = _refill(*(row or (burst, now)), now, rate, burst)
+            allowed = tokens >= 1
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                (key, tokens - 1 if allowed else tokens, now),
+            )
+            self.takes += 1
+            if self.takes % 10000 == 0:
+                # buckets idle this long are full again; dropping them changes nothing
+                conn.execute("DELETE FROM buckets WHERE updated < ?", (now - 3600,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return 0.0 if allowed else (1 - tokens) / rate
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        try:
+            return await asyncio.to_thread(self._take, key, rate, burst)
+        except sqlite3.Error:
+            logger.exception("Rate limit store unavailable, admitting request")
+            return 0.0
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM buckets").fetchone()[0]
+
+class Admission:
+    def __init__(self):
+        self.rules = load_rules()
+        self.buckets = SqliteBuckets(ADMISSION_STORE_PATH) if ADMISSION_STORE_PATH else MemoryBuckets(ADMISSION_MAX_KEYS)
+        self.in_flight = 0
+        self.lag_ms = 0.0
+        self._task = None
+
+    def match(self, method: str, path: str):
+        return next((r for r in self.rules if r.matches(method, path)), None)
+
+    async def _watch_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(ADMISSION_LAG_INTERVAL)
+            self.lag_ms = max(0.0, (loop.time() - started - ADMISSION_LAG_INTERVAL) * 1000)
+
+    async def start(self):
+        self._task = asyncio.create_task(self._watch_lag())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {"in_flight": self.in_flight, "loop_lag_ms": self.lag_ms, "buckets": len(self.buckets)}
+
+admission = Admission()
+
+async def _reject(send, status: int, detail: str, retry_after: float):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+def _client_ip(scope) -> str:
+    if ADMISSION_TRUST_FORWARDED:
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+async def _read_body(receive):
+    """Reads the request body and returns it with a receive that replays it to the app."""
+    chunks = []
+    size = 0
+    more = True
+    while more:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        size += len(chunks[-1])
+        more = message.get("more_body", False)
+    body = b"".join(chunks)
+    replayed = False
+
+    async def replay():
+        nonlocal replayed
+        if not replayed:
+            replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return (body if size <= ADMISSION_MAX_BODY else b""), replay
+
+def _account(body: bytes):
+    try:
+        email = json.loads(body).get("email")
+    except (ValueError, AttributeError):
+        return None
+    return email.strip().lower() if isinstance(email, str) else None
+
+class AdmissionMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].endswith(EXEMPT_SUFFIXES):
+            return await self.app(scope, receive, send)
+
+        rule = admission.match(scope["method"], scope["path"])
+        name = rule.name if rule else "default"
+        if admission.in_flight >= ADMISSION_MAX_CONCURRENCY:
+            ADMISSION_DECISIONS.labels(name, "overloaded").inc()
+            return await _reject(send, 503, "Server is overloaded, please retry", 1)
+
+        if rule is not None:
+            if admission.lag_ms >= ADMISSION_MAX_LAG_MS:
+                ADMISSION_DECISIONS.labels(name, "lagging").inc()
+                return await _reject(send, 503, "Server is overloaded, please retry", 1)
+            if rule.ip:
+                wait = await admission.buckets.take(f"ip:{name}:{_client_ip(scope)}", *rule.ip)
+                if wait:
+                    ADMISSION_DECISIONS.labels(name, "ip_limited").inc()
+                    return await _reject(send, 429, "Too many requests", wait)
+            if rule.account:
+                body, receive = await _read_body(receive)
+                account = _account(body)
+                if account:
+                    wait = await admission.buckets.take(f"account:{name}:{account}", *rule.account)
+                    if wait:
+                        ADMISSION_DECISIONS.labels(name, "account_limited").inc()
+                        return await _reject(send, 429, "Too many attempts for this account", wait)
+            ADMISSION_DECISIONS.labels(name, "allowed").inc()
+
+        admission.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission.in_flight -= 1
@@ -0,0 +1,107 @@
+import os
+import time
+from collections import OrderedDict
+from bson import ObjectId
+from fastapi import HTTPException
+from .database import db
+
+PROJECT_CACHE_SIZE = int(os.getenv("PROJECT_CACHE_SIZE", "10000"))
+PROJECT_CACHE_TTL = float(os.getenv("PROJECT_CACHE_TTL", "30"))
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "1000"))
+SUMMARY_CACHE_TTL = float(os.getenv("SUMMARY_CACHE_TTL", "30"))
+PROJECT_KEY_CACHE_TTL = float(os.getenv("PROJECT_KEY_CACHE_TTL", "300"))
+
+class TTLCache:
+    """Bounded LRU cache whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl: float | None = None):
+        self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+# Projects being torn down by the deletion worker are hidden from every route
+ACTIVE = {"status": {"$ne": "deleting"}}
+
+# project_id -> {"key": ..., "owner": ..., "roles": {email: role}}
+project_roles = TTLCache(PROJECT_CACHE_SIZE, PROJECT_CACHE_TTL)
+
+# project key -> project_id, for issue key lookups
+project_ids = TTLCache(PROJECT_CACHE_SIZE, PROJECT_KEY_CACHE_TTL)
+
+# project_id -> ProjectSummary dict
+project_summaries = TTLCache(SUMMARY_CACHE_SIZE, SUMMARY_CACHE_TTL)
+
+async def issues_changed(project_id: str):
+    """Called by every issue write path: drops views derived from the project's
+    issues and bumps the project version that HTTP ETags are built from."""
+    project_summaries.invalidate(project_id)
+    await db.projects.update_one({"_id": ObjectId(project_id)}, {"$inc": {"version": 1}})
+
+async def get_project_roles(project_id: str) -> dict:
+    entry = project_roles.get(project_id)
+    if entry is None:
+        project = await db.projects.find_one(
+            {"_id": ObjectId(project_id), **ACTIVE},
+            {"key": 1, "owner": 1, "members": 1},
+        )
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+        entry = {
+            "key": project["key"],
+            "owner": project["owner"],
+            "roles": {m["email"]: m["role"] for m in project.get("members", [])},
+        }
+        project_roles.set(project_id, entry)
+    return entry
+
+async def get_project_id(key: str) -> str:
+    project_id = project_ids.get(key)
+    if project_id is None:
+        project = await db.projects.find_one({"key": key, **ACTIVE}, {"_id": 1})
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+        project_id = str(project["_id"])
+        project_ids.set(key, project_id)
+    return project_id
@@ -1,9 +1,153 @@
 import motor.motor_asyncio
 import os
+import threading
 from dotenv import load_dotenv
+from pymongo import monitoring
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+from .metrics import MongoCommandListener
 
 load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-client = motor.motor_asyncio.AsyncIOMotorClient(MONGO_URI)
-db = client["sprintium"]
\ No newline at end of file
+MONGO_DB = os.getenv("MONGO_DB", "sprintium")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+# How long a request may wait for a free pooled connection before failing
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "30000"))
+# e.g. "zstd,snappy,zlib"; zstd and snappy need the zstandard / python-snappy packages
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "")
+# Read preference for read-only endpoints (list_issues, list_projects, ...), e.g. secondaryPreferred
+MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "primary")
+MONGO_READ_MAX_STALENESS_S = int(os.getenv("MONGO_READ_MAX_STALENESS_S", "-1"))
+
+READ_PREFERENCES = {
+    "primary": lambda staleness: Primary(),
+    "primaryPreferred": lambda staleness: PrimaryPreferred(max_staleness=staleness),
+    "secondary": lambda staleness: Secondary(max_staleness=staleness),
+    "secondaryPreferred": lambda staleness: SecondaryPreferred(max_staleness=staleness),
+    "nearest": lambda staleness: Nearest(max_staleness=staleness),
+}
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Connection pool gauges, so exhaustion shows up as waiting/timeouts under load."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+        self.checked_out = 0
+        self.waiting = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+
+    def _add(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def connection_created(self, event):
+        self._add(open=1)
+
+    def connection_closed(self, event):
+        self._add(open=-1)
+
+    def connection_check_out_started(self, event):
+        self._add(waiting=1)
+
+    def connection_checked_out(self, event):
+        self._add(waiting=-1, checked_out=1, checkouts=1)
+
+    def connection_check_out_failed(self, event):
+        self._add(waiting=-1, checkout_failures=1)
+
+    def connection_checked_in(self, event):
+        self._add(checked_out=-1)
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def stats(self) -> dict:
+        return {
+            "max_size": MONGO_MAX_POOL_SIZE,
+            "open": self.open,
+            "checked_out": self.checked_out,
+            "waiting": self.waiting,
+            "checkouts": self.checkouts,
+            "checkout_failures": self.checkout_failures,
+        }
+
+pool_stats = PoolStats()
+
+client = None
+_databases = {}
+
+def connect(mongo_client=None):
+    """Creates the process's Motor client. Called from the app lifespan so each
+    worker process gets its own client after fork; pass `mongo_client` to use a
+    pre-built one (e.g. mongomock in benchmarks)."""
+    global client
+    if mongo_client is None:
+        options = {
+            "maxPoolSize": MONGO_MAX_POOL_SIZE,
+            "minPoolSize": MONGO_MIN_POOL_SIZE,
+            "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+            "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+            "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS,
+            "event_listeners": [MongoCommandListener(), pool_stats],
+        }
+        if MONGO_COMPRESSORS:
+            options["compressors"] = MONGO_COMPRESSORS
+        mongo_client = motor.motor_asyncio.AsyncIOMotorClient(MONGO_URI, **options)
+    client = mongo_client
+    _databases.clear()
+    _databases["primary"] = client[MONGO_DB]
+    _databases["read"] = client.get_database(
+        MONGO_DB, read_preference=READ_PREFERENCES[MONGO_READ_PREFERENCE](MONGO_READ_MAX_STALENESS_S)
+    )
+    return client
+
+def close():
+    global client
+    if client is not None:
+        client.close()
+    client = None
+    _databases.clear()
+
+class _Database:
+    """Stands in for the current client's database so modules can keep
+    `from ..database import db` while the client itself is created at startup."""
+
+    def __init__(self, kind: str):
+        self._kind = kind
+
+    def _get(self):
+        if client is None:
+            connect()   # scripts such as `python -m app.indexes` run without the lifespan
+        return _databases[self._kind]
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+    def __getitem__(self, name):
+        return self._get()[name]
+
+db = _Database("primary")
+# Same database with MONGO_READ_PREFERENCE applied, for read-only endpoints
+read_db = _Database("read")
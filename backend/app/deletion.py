@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import ReturnDocument
+from .database import db
+from .cache import ACTIVE, project_ids, project_roles, project_summaries
+
+logger = logging.getLogger(__name__)
+
+DELETE_BATCH_SIZE = int(os.getenv("DELETE_BATCH_SIZE", "1000"))
+# Pause between batches so a large delete leaves room for live traffic
+DELETE_BATCH_PAUSE = float(os.getenv("DELETE_BATCH_PAUSE", "0.1"))
+# A job whose lease has lapsed (crashed or restarted worker) is picked up again
+DELETE_LEASE_SECONDS = float(os.getenv("DELETE_LEASE_SECONDS", "60"))
+DELETE_POLL_SECONDS = float(os.getenv("DELETE_POLL_SECONDS", "30"))
+
+class ProjectDeleter:
+    """Removes deleting projects and their issues in the background.
+
+    Jobs live in db.project_deletions keyed by project id, so progress survives
+    restarts and any worker process can resume a job once its lease expires.
+    """
+
+    def __init__(self):
+        # set in start(), which runs after a preloading server has forked its workers
+        self.owner = None
+        self.deleted_issues = 0
+        self.completed = 0
+        self._wake = None
+        self._task = None
+        self._stopping = False
+
+    async def schedule(self, project_id: str, current_user: str) -> dict | None:
+        """Marks an active project as deleting and queues its job; None if it was already
+        deleting or current_user is not one of its Admins."""
+        project = await db.projects.find_one_and_update(
+            {"_id": ObjectId(project_id), **ACTIVE, "members": {"$elemMatch": {"email": current_user, "role": "Admin"}}},
+            {"$set": {"status": "deleting"}, "$inc": {"version": 1}},
+            projection={"key": 1, "members": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        if project is None:
+            return None
+        project_roles.invalidate(project_id)
+        project_ids.invalidate(project["key"])
+        project_summaries.invalidate(project_id)
+
+        job = {
+            "_id": project_id,
+            "status": "running",
+            "requested_by": current_user,
+            "requested_at": datetime.utcnow(),
+            "key": project["key"],
+            # kept so former members can still follow progress once the project is gone
+            "members": [m["email"] for m in project.get("members", [])],
+            "total_issues": await db.issues.count_documents({"project_id": project_id}),
+            "deleted_issues": 0,
+            "lease_expires": datetime.min,
+        }
+        await db.project_deletions.replace_one({"_id": project_id}, job, upsert=True)
+        if self._wake is not None:
+            self._wake.set()
+        return job
+
+    async def _claim(self):
+        now = datetime.utcnow()
+        return await db.project_deletions.find_one_and_update(
+            {"status": "running", "lease_expires": {"$lt": now}},
+            {"$set": {"lease_owner": self.owner, "lease_expires": now + timedelta(seconds=DELETE_LEASE_SECONDS)}},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _renew(self, project_id: str, deleted: int) -> bool:
+        result = await db.project_deletions.update_one(
+            {"_id": project_id, "lease_owner": self.owner},
+            {
+                "$inc": {"deleted_issues": deleted},
+                "$set": {"lease_expires": datetime.utcnow() + timedelta(seconds=DELETE_LEASE_SECONDS)},
+            },
+        )
+        return result.matched_count == 1
+
+    async def _run_job(self, job: dict):
+        project_id = job["_id"]
+        while True:
+            ids = [doc["_id"] async for doc in db.issues.find({"project_id": project_id}, {"_id": 1}).limit(DELETE_BATCH_SIZE)]
+            if not ids:
+                break
+            result = await db.issues.delete_many({"_id": {"$in": ids}})
+            self.deleted_issues += result.deleted_count
+            if not await self._renew(project_id, result.deleted_count):
+                logger.warning("Lost the lease on deletion of project %s", project_id)
+                return
+            await asyncio.sleep(DELETE_BATCH_PAUSE)
+
+        await db.projects.delete_one({"_id": ObjectId(project_id), "status": "deleting"})
+        # sweep issues created by requests that raced with the batches above
+        await db.issues.delete_many({"project_id": project_id})
+        await db.project_deletions.update_one(
+            {"_id": project_id, "lease_owner": self.owner},
+            {"$set": {"status": "done", "finished_at": datetime.utcnow()}, "$unset": {"lease_owner": "", "lease_expires": ""}},
+        )
+        project_roles.invalidate(project_id)
+        project_summaries.invalidate(project_id)
+        if job.get("key"):
+            project_ids.invalidate(job["key"])
+        self.completed += 1
+
+    async def _run(self):
+        # wait_for() can swallow a cancel that races with the wake-up, so stop() also sets a flag
+        while not self._stopping:
+            self._wake.clear()
+            try:
+                job = await self._claim()
+                while job is not None:
+                    await self._run_job(job)
+                    job = await self._claim()
+            except Exception:
+                logger.exception("Project deletion worker failed")
+            try:
+                await asyncio.wait_for(self._wake.wait(), DELETE_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self):
+        self.owner = uuid.uuid4().hex
+        self._stopping = False
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._stopping = True
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {"deleted_issues": self.deleted_issues, "completed": self.completed}
+
+project_deletions = ProjectDeleter()
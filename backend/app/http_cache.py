@@ -0,0 +1,28 @@
+import hashlib
+import os
+from fastapi import Request, Response
+
+# Authenticated responses: browsers may keep them but must revalidate every time
+CACHE_CONTROL = os.getenv("CACHE_CONTROL", "private, no-cache")
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()
+    # Weak: GZipMiddleware may encode the body, and a strong tag would then
+    # name two different byte sequences
+    return f'W/"{digest}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison
+    etag = etag.removeprefix("W/")
+    return etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+def cache_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag))
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import sys
+from datetime import datetime
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+from .activity import ACTIVITY_RETENTION_DAYS
+from .issue_keys import number_prefix_ranges
+
+logger = logging.getLogger(__name__)
+
+# Every index the routes rely on. create_indexes is a no-op for indexes that
+# already exist with the same name and spec, so this is safe to run on each boot.
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "projects": [
+        IndexModel([("key", ASCENDING)], name="key_unique", unique=True),
+        IndexModel([("members.email", ASCENDING)], name="members_email"),
+    ],
+    "issues": [
+        IndexModel([("project_id", ASCENDING), ("updated_at", DESCENDING), ("_id", DESCENDING)], name="project_updated"),
+        IndexModel([("project_id", ASCENDING), ("status", ASCENDING), ("updated_at", DESCENDING), ("_id", DESCENDING)], name="project_status_updated"),
+        IndexModel([("project_id", ASCENDING), ("assignee", ASCENDING), ("updated_at", DESCENDING), ("_id", DESCENDING)], name="project_assignee_updated"),
+        IndexModel([("project_id", ASCENDING), ("reporter", ASCENDING), ("updated_at", DESCENDING), ("_id", DESCENDING)], name="project_reporter_updated"),
+        # GET /users/me/issues: one index per branch of its assignee/reporter $or
+        IndexModel([("assignee", ASCENDING), ("updated_at", DESCENDING), ("_id", DESCENDING)], name="assignee_updated"),
+        IndexModel([("reporter", ASCENDING), ("updated_at", DESCENDING), ("_id", DESCENDING)], name="reporter_updated"),
+        # Board columns in drag-and-drop order (list_issues?sort=rank, moves, rebalancing)
+        IndexModel([("project_id", ASCENDING), ("status", ASCENDING), ("rank", ASCENDING), ("_id", ASCENDING)], name="project_status_rank"),
+        # Issue keys; partial so issues that predate numbering don't collide on null
+        IndexModel(
+            [("project_id", ASCENDING), ("number", ASCENDING)],
+            name="project_number_unique",
+            unique=True,
+            partialFilterExpression={"number": {"$exists": True}},
+        ),
+        # project_id prefix keeps text search scoped to (and as fast as) one project
+        IndexModel(
+            [("project_id", ASCENDING), ("title", TEXT), ("description", TEXT)],
+            name="project_text",
+            weights={"title": 5, "description": 1},
+        ),
+    ],
+    "revoked_tokens": [
+        IndexModel([("expires_at", ASCENDING)], name="expires_ttl", expireAfterSeconds=0),
+        IndexModel([("revoked_at", ASCENDING)], name="revoked_at"),
+    ],
+    "activity": [
+        IndexModel([("project_id", ASCENDING), ("at", DESCENDING), ("_id", DESCENDING)], name="project_at"),
+        IndexModel([("project_id", ASCENDING), ("issue_id", ASCENDING), ("at", DESCENDING), ("_id", DESCENDING)], name="project_issue_at"),
+        # Changing ACTIVITY_RETENTION_DAYS later needs a collMod (or dropping this index)
+        IndexModel([("at", ASCENDING)], name="at_ttl", expireAfterSeconds=ACTIVITY_RETENTION_DAYS * 86400),
+    ],
+    "project_deletions": [
+        IndexModel([("status", ASCENDING), ("lease_expires", ASCENDING)], name="status_lease"),
+        IndexModel([("members", ASCENDING)], name="members"),
+    ],
+}
+
+# (name, collection, filter, sort) for each query a route issues; values are
+# placeholders, only the shape matters to the planner.
+_PROJECT_ID = str(ObjectId())
+_LIST_SORT = [("updated_at", DESCENDING), ("_id", DESCENDING)]
+QUERY_SHAPES = [
+    ("users.by_email", "users", {"email": "user@example.com"}, None),
+    ("projects.by_key", "projects", {"key": "KEY"}, None),
+    ("projects.by_member", "projects", {"members.email": "user@example.com"}, None),
+    ("issues.list", "issues", {"project_id": _PROJECT_ID}, _LIST_SORT),
+    ("issues.list_page", "issues", {"project_id": _PROJECT_ID, "$or": [
+        {"updated_at": {"$lt": datetime(2000, 1, 1)}},
+        {"updated_at": datetime(2000, 1, 1), "_id": {"$lt": ObjectId()}},
+    ]}, _LIST_SORT),
+    ("issues.list_by_status", "issues", {"project_id": _PROJECT_ID, "status": "To Do"}, _LIST_SORT),
+    ("issues.list_by_assignee", "issues", {"project_id": _PROJECT_ID, "assignee": "user@example.com"}, _LIST_SORT),
+    ("issues.list_by_reporter", "issues", {"project_id": _PROJECT_ID, "reporter": "user@example.com"}, _LIST_SORT),
+    ("issues.column", "issues", {"project_id": _PROJECT_ID, "status": "To Do"}, [("rank", ASCENDING), ("_id", ASCENDING)]),
+    ("issues.by_number", "issues", {"project_id": _PROJECT_ID, "number": 1}, None),
+    ("issues.by_number_prefix", "issues", {"project_id": _PROJECT_ID, "$or": number_prefix_ranges(1)}, [("number", ASCENDING)]),
+    ("issues.mine", "issues", {"$or": [{"assignee": "user@example.com"}, {"reporter": "user@example.com"}]}, _LIST_SORT),
+    ("activity.list", "activity", {"project_id": _PROJECT_ID}, [("at", DESCENDING), ("_id", DESCENDING)]),
+    ("issues.search", "issues", {"project_id": _PROJECT_ID, "$text": {"$search": "login bug"}}, None),
+]
+
+async def ensure_indexes(db):
+    for collection, indexes in INDEXES.items():
+        try:
+            await db[collection].create_indexes(indexes)
+        except OperationFailure as e:
+            # e.g. duplicate emails blocking a unique index; keep serving and surface it
+            logger.error("Failed to create indexes on %s: %s", collection, e)
+
+def _stages(plan):
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _stages(item)
+
+async def verify_query_plans(db):
+    """Explain every query shape and return {name: [stages]} for those that still COLLSCAN."""
+    failures = {}
+    for name, collection, query, sort in QUERY_SHAPES:
+        cursor = db[collection].find(query).limit(1)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = await cursor.explain()
+        stages = list(_stages(plan["queryPlanner"]["winningPlan"]))
+        if "COLLSCAN" in stages:
+            failures[name] = stages
+    return failures
+
+async def _main():
+    from .database import db
+
+    await ensure_indexes(db)
+    failures = await verify_query_plans(db)
+    for name, collection, _, _ in QUERY_SHAPES:
+        print(f"{'COLLSCAN' if name in failures else 'ok':<10} {name}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    # python -m app.indexes  (from backend/) creates indexes and checks query plans
+    sys.exit(asyncio.run(_main()))
@@ -0,0 +1,98 @@
+import codecs
+import csv
+import io
+import orjson
+from .serializers import dumps, issue_out
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+EXPORT_FIELDS = ["id", "key", "number", "title", "description", "status", "reporter", "assignee", "created_at", "updated_at"]
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+async def export_chunks(cursor, fmt: str, project_key: str, batch_size: int):
+    """Encodes issues from `cursor` as NDJSON or CSV, one chunk per `batch_size` rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == "csv":
+        writer.writerow(EXPORT_FIELDS)
+    lines = []
+    rows = 0
+    async for doc in cursor:
+        out = issue_out(doc, project_key=project_key)
+        if fmt == "csv":
+            writer.writerow([_csv_value(out.get(f)) for f in EXPORT_FIELDS])
+        else:
+            lines.append(dumps(out))
+        rows += 1
+        if rows % batch_size == 0:
+            yield _flush(fmt, buffer, lines)
+    yield _flush(fmt, buffer, lines)
+
+def _flush(fmt: str, buffer: io.StringIO, lines: list) -> bytes:
+    if fmt == "csv":
+        chunk = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+    chunk = b"".join(line + b"\n" for line in lines)
+    lines.clear()
+    return chunk
+
+async def _lines(stream):
+    """Yields decoded lines from an async byte stream without buffering the whole body."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in stream:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+async def read_records(stream, fmt: str):
+    """Yields (line_number, row dict or error message) for each record in an NDJSON or CSV upload.
+
+    CSV fields may contain quoted newlines, so physical lines are joined until
+    the quotes balance before a record is parsed.
+    """
+    header = None
+    record = []
+    start = 0
+    line_number = 0
+    async for line in _lines(stream):
+        line_number += 1
+        if fmt == "ndjson":
+            if not line.strip():
+                continue
+            try:
+                row = orjson.loads(line)
+            except orjson.JSONDecodeError as e:
+                yield line_number, f"Invalid JSON: {e}"
+                continue
+            yield line_number, row if isinstance(row, dict) else "Expected a JSON object"
+            continue
+
+        if not record:
+            start = line_number
+        record.append(line)
+        text = "\n".join(record)
+        if text.count('"') % 2:
+            continue
+        record = []
+        if not text.strip():
+            continue
+        values = next(csv.reader([text.rstrip("\r")]))
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+        # Empty cells mean "not set", so IssueCreate defaults apply
+        yield start, {h: v for h, v in zip(header, values) if v != ""}
+    if record:
+        yield start, "Unterminated quoted field"
@@ -0,0 +1,64 @@
+import asyncio
+import re
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import ReturnDocument, UpdateOne
+from .database import db
+
+# "SPR-123": project key, dash, per-project issue number
+ISSUE_KEY = re.compile(r"^([A-Za-z0-9]+)-([1-9][0-9]{0,17})$")
+MAX_ISSUE_NUMBER = 10 ** 18
+
+def parse_issue_key(issue_key: str):
+    """Returns (project_key, number), or None if this is not an issue key."""
+    match = ISSUE_KEY.match(issue_key.strip())
+    if not match:
+        return None
+    return match.group(1).upper(), int(match.group(2))
+
+def number_prefix_ranges(prefix: int) -> list:
+    """Conditions for an $or matching the numbers whose digits start with `prefix`:
+    12 -> 12, 120-129, 1200-1299 ... each one range of the project_number index."""
+    ranges = [{"number": prefix}]
+    low, high = prefix * 10, prefix * 10 + 9
+    while low < MAX_ISSUE_NUMBER:
+        ranges.append({"number": {"$gte": low, "$lte": high}})
+        low, high = low * 10, high * 10 + 9
+    return ranges
+
+def format_issue_key(project_key: str, number: int | None):
+    return f"{project_key}-{number}" if number is not None else None
+
+async def allocate_issue_numbers(project_id: str, count: int = 1) -> int:
+    """Atomically reserves `count` consecutive issue numbers and returns the first."""
+    project = await db.projects.find_one_and_update(
+        {"_id": ObjectId(project_id)},
+        {"$inc": {"issue_seq": count}},
+        projection={"issue_seq": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    if project is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return project["issue_seq"] - count + 1
+
+async def backfill_issue_numbers():
+    """Numbers issues created before issue keys existed, oldest first."""
+    total = 0
+    async for project in db.projects.find({}, {"_id": 1}):
+        project_id = str(project["_id"])
+        ids = [i["_id"] async for i in db.issues.find(
+            {"project_id": project_id, "number": {"$exists": False}}, {"_id": 1},
+        ).sort([("created_at", 1), ("_id", 1)])]
+        if not ids:
+            continue
+        first = await allocate_issue_numbers(project_id, len(ids))
+        await db.issues.bulk_write([
+            UpdateOne({"_id": _id, "number": {"$exists": False}}, {"$set": {"number": first + n}})
+            for n, _id in enumerate(ids)
+        ], ordered=False)
+        total += len(ids)
+    return total
+
+if __name__ == "__main__":
+    # python -m app.issue_keys  (from backend/) gives existing issues their keys
+    print(f"Numbered {asyncio.run(backfill_issue_numbers())} issues")
@@ -1,25 +1,110 @@
-from fastapi import FastAPI
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest, multiprocess
+from . import database
+from .database import db, pool_stats
+from .cache import project_ids, project_roles, project_summaries
+from .realtime import issue_events
+from .revocation import revocations
+from .deletion import project_deletions
+from .activity import activity_log
+from .ranking import rank_rebalancer
+from .admission import AdmissionMiddleware, admission
+from .utils import token_claims, hash_pool_stats
+from .metrics import MetricsMiddleware, stats_collector
+from .indexes import ensure_indexes
+from .serializers import FastJSONResponse
+from .singleflight import project_reads, issue_list_reads
 from .routes import auth, user, project, issue
 
 
-app = FastAPI(title="Sprintium Backend")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Created here rather than at import so every worker process owns its client
+    if database.client is None:
+        database.connect()
+    await ensure_indexes(db)
+    await revocations.start()
+    await project_deletions.start()
+    await rank_rebalancer.start()
+    await activity_log.start()
+    await admission.start()
+    yield
+    await admission.stop()
+    await project_deletions.stop()
+    await rank_rebalancer.stop()
+    await revocations.stop()
+    await issue_events.stop()
+    await activity_log.stop()
+    database.close()
+
+
+app = FastAPI(title="Sprintium Backend", lifespan=lifespan, default_response_class=FastJSONResponse)
 
 origins = ["*"]
 
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", "1024"))
+
+# Innermost, so rejections still get CORS headers and are counted by MetricsMiddleware
+app.add_middleware(AdmissionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Next-Offset", "ETag"],
 )
+# Compresses bodies above GZIP_MIN_SIZE; event streams are left alone
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE)
+app.add_middleware(MetricsMiddleware)
+
+stats_collector.add("project_roles_cache", project_roles.stats)
+stats_collector.add("project_summaries_cache", project_summaries.stats)
+stats_collector.add("project_ids_cache", project_ids.stats)
+stats_collector.add("token_claims_cache", token_claims.stats)
+stats_collector.add("revocations", revocations.stats)
+stats_collector.add("hash_pool", hash_pool_stats)
+stats_collector.add("mongo_pool", pool_stats.stats)
+stats_collector.add("project_deletions", project_deletions.stats)
+stats_collector.add("activity_log", activity_log.stats)
+stats_collector.add("rank_rebalancer", rank_rebalancer.stats)
+stats_collector.add("admission", admission.stats)
+stats_collector.add("singleflight_get_project", project_reads.stats)
+stats_collector.add("singleflight_list_issues", issue_list_reads.stats)
 
 app.include_router(auth.router)
 app.include_router(user.router)
 app.include_router(project.router)
 app.include_router(issue.router)
+app.include_router(issue.keys_router)
 
 @app.get("/")
 def root():
     return {"message": "Sprintium backend is running 🚀"}
+
+@app.get("/debug/cache")
+def cache_stats():
+    return {
+        "project_roles": project_roles.stats(),
+        "project_summaries": project_summaries.stats(),
+        "project_ids": project_ids.stats(),
+        "token_claims": token_claims.stats(),
+        "revocations": revocations.stats(),
+        "mongo_pool": pool_stats.stats(),
+        "singleflight": {"get_project": project_reads.stats(), "list_issues": issue_list_reads.stats()},
+    }
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        # Under `run_server.py --prod` sum histograms and counters across workers;
+        # the cache/pool gauges above only describe the worker serving this scrape.
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(stats_collector)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
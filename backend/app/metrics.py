@@ -0,0 +1,124 @@
+import contextvars
+import logging
+import os
+import time
+from prometheus_client import Counter, Histogram, REGISTRY
+from prometheus_client.core import GaugeMetricFamily
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+
+REQUEST_SECONDS = Histogram(
+    "sprintium_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+REQUEST_MONGO_COMMANDS = Histogram(
+    "sprintium_request_mongo_commands", "Mongo commands issued per HTTP request",
+    ["method", "route"], buckets=(0, 1, 2, 3, 4, 5, 8, 13, 21, 34, 55),
+)
+REQUEST_MONGO_SECONDS = Histogram(
+    "sprintium_request_mongo_seconds", "Time spent in Mongo per HTTP request",
+    ["method", "route"],
+)
+MONGO_COMMANDS = Counter("sprintium_mongo_commands_total", "Mongo commands by name and outcome", ["command", "outcome"])
+MONGO_SECONDS = Histogram("sprintium_mongo_command_duration_seconds", "Mongo command latency", ["command"])
+WORK_SECONDS = Histogram(
+    "sprintium_work_duration_seconds", "CPU-bound work (bcrypt, JWT)", ["kind"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+class RequestStats:
+    __slots__ = ("mongo_commands", "mongo_seconds")
+
+    def __init__(self):
+        self.mongo_commands = 0
+        self.mongo_seconds = 0.0
+
+# Motor runs pymongo calls in a copy of the caller's context, so the listener
+# below sees the stats object of the request that issued the command.
+request_stats = contextvars.ContextVar("request_stats", default=None)
+
+class MongoCommandListener(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event, "ok")
+
+    def failed(self, event):
+        self._record(event, "error")
+
+    def _record(self, event, outcome):
+        seconds = event.duration_micros / 1_000_000
+        MONGO_COMMANDS.labels(event.command_name, outcome).inc()
+        MONGO_SECONDS.labels(event.command_name).observe(seconds)
+        stats = request_stats.get()
+        if stats is not None:
+            stats.mongo_commands += 1
+            stats.mongo_seconds += seconds
+
+def timed(kind: str, fn):
+    def run(*args, **kwargs):
+        with WORK_SECONDS.labels(kind).time():
+            return fn(*args, **kwargs)
+    return run
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        status_code = 500
+        streaming = False
+
+        async def send_wrapper(message):
+            nonlocal status_code, streaming
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                streaming = any(k == b"content-type" and v.startswith(b"text/event-stream") for k, v in message.get("headers", []))
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            request_stats.reset(token)
+            # Long-lived event streams would only skew the latency histograms
+            if not streaming:
+                route = scope.get("route")
+                template = route.path if route is not None else "unmatched"
+                method = scope["method"]
+                REQUEST_SECONDS.labels(method, template, str(status_code)).observe(elapsed)
+                REQUEST_MONGO_COMMANDS.labels(method, template).observe(stats.mongo_commands)
+                REQUEST_MONGO_SECONDS.labels(method, template).observe(stats.mongo_seconds)
+                if elapsed * 1000 >= SLOW_REQUEST_MS:
+                    logger.warning(
+                        "Slow request %s %s -> %d in %.0fms (%d Mongo commands, %.0fms in Mongo)",
+                        method, template, status_code, elapsed * 1000, stats.mongo_commands, stats.mongo_seconds * 1000,
+                    )
+
+class StatsCollector:
+    """Exposes the stats() dicts of in-process caches and pools as gauges."""
+
+    def __init__(self):
+        self.sources = {}
+
+    def add(self, name: str, stats):
+        self.sources[name] = stats
+
+    def collect(self):
+        for name, stats in self.sources.items():
+            for key, value in stats().items():
+                if isinstance(value, (int, float)):
+                    yield GaugeMetricFamily(f"sprintium_{name}_{key}", f"{name} {key}", value=value)
+
+stats_collector = StatsCollector()
+REGISTRY.register(stats_collector)
@@ -2,15 +2,22 @@ from pydantic import BaseModel, Field
 from typing import Optional, List, Literal
 from datetime import datetime
 
+BULK_MAX_OPERATIONS = 500
+
+IssueStatus = Literal["To Do", "In Progress", "Done"]
+
 class IssueCreate(BaseModel):
     title: str
     description: Optional[str] = None
-    status: Literal["To Do", "In Progress", "Done"] = "To Do"
+    status: IssueStatus = "To Do"
     assignee: Optional[str] = None
 
 class IssueOut(BaseModel):
     id: str
     project_id: str
+    number: Optional[int] = None   # None for issues created before keys, until backfilled
+    key: Optional[str] = None      # e.g. "SPR-123"
+    rank: Optional[str] = None     # position within its status column; compare as strings
     title: str
     description: Optional[str]
     status: str
@@ -18,3 +25,51 @@ class IssueOut(BaseModel):
     assignee: Optional[str]
     created_at: datetime
     updated_at: datetime
+
+class IssueSearchResult(IssueOut):
+    score: float
+
+class IssuePartial(BaseModel):
+    id: str
+    project_id: Optional[str] = None
+    number: Optional[int] = None
+    key: Optional[str] = None
+    rank: Optional[str] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    status: Optional[str] = None
+    reporter: Optional[str] = None
+    assignee: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class IssueMove(BaseModel):
+    # The card's new neighbours in the target column; omit both to move it to the bottom
+    after_id: Optional[str] = None
+    before_id: Optional[str] = None
+    status: Optional[IssueStatus] = None   # target column, defaults to the current one
+
+class BulkOperation(BaseModel):
+    op: Literal["create", "update", "transition", "delete"]
+    issue_id: Optional[str] = None       # update, transition, delete
+    data: Optional[IssueCreate] = None   # create, update
+    status: Optional[IssueStatus] = None # transition
+
+class BulkRequest(BaseModel):
+    operations: List[BulkOperation] = Field(..., min_length=1, max_length=BULK_MAX_OPERATIONS)
+
+class BulkResult(BaseModel):
+    index: int
+    op: str
+    id: Optional[str] = None
+    code: int
+    detail: Optional[str] = None
+
+class ImportRowError(BaseModel):
+    line: int
+    detail: str
+
+class ImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ImportRowError]   # the first IMPORT_MAX_ERRORS failures
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field, EmailStr
-from typing import Optional, List
+from typing import Any, Optional, List, Dict
 from datetime import datetime
+from .issue import IssueOut
 
 class Member(BaseModel):
     email: EmailStr
@@ -8,7 +9,8 @@ class Member(BaseModel):
 
 class ProjectCreate(BaseModel):
     name: str
-    key: str = Field(..., min_length=2, max_length=10)
+    # letters and digits only, so issue keys ("KEY-123") split unambiguously on the dash
+    key: str = Field(..., min_length=2, max_length=10, pattern=r"^[A-Za-z0-9]+$")
     description: Optional[str] = None
     type: str = "software"
 
@@ -21,3 +23,44 @@ class ProjectOut(BaseModel):
     owner: str
     members: List[Member]
     created_at: datetime
+
+class ProjectDetail(ProjectOut):
+    current_user_role: str
+
+class AssigneeCount(BaseModel):
+    assignee: Optional[str]
+    count: int
+
+class ProjectSummary(BaseModel):
+    project_id: str
+    total: int
+    by_status: Dict[str, int]
+    by_assignee: List[AssigneeCount]
+    open_by_age: Dict[str, int]
+    recent: List[IssueOut]
+    generated_at: datetime
+
+class ProjectDeletion(BaseModel):
+    project_id: str
+    status: str
+    requested_by: str
+    requested_at: datetime
+    total_issues: int
+    deleted_issues: int
+    finished_at: Optional[datetime] = None
+
+class FieldChange(BaseModel):
+    old: Any = None
+    new: Any = None
+
+class Activity(BaseModel):
+    id: str
+    project_id: str
+    at: datetime
+    actor: str
+    action: str                   # e.g. issue.updated, member.role_changed
+    issue_id: Optional[str] = None
+    issue_key: Optional[str] = None
+    member: Optional[str] = None
+    changes: Dict[str, FieldChange] = {}
+    count: Optional[int] = None   # issues.imported
@@ -0,0 +1,56 @@
+import base64
+import json
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(value: datetime | str | None, _id: ObjectId) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, str(_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, parse=datetime.fromisoformat):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, _id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return parse(value), ObjectId(_id)
+    except (ValueError, TypeError, InvalidId):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_filter(cursor: str | None, field: str = "updated_at") -> dict:
+    """Filter for the page after `cursor` when sorting by (field, _id) descending."""
+    if not cursor:
+        return {}
+    value, _id = decode_cursor(cursor)
+    return {"$or": [
+        {field: {"$lt": value}},
+        {field: value, "_id": {"$lt": _id}},
+    ]}
+
+def _rank(value):
+    if value is not None and not isinstance(value, str):
+        raise TypeError(f"Invalid rank {value!r}")
+    return value
+
+def rank_filter(cursor: str | None) -> dict:
+    """Filter for the page after `cursor` when sorting by (rank, _id) ascending."""
+    if not cursor:
+        return {}
+    rank, _id = decode_cursor(cursor, parse=_rank)
+    if rank is None:
+        # Unranked issues (from before ranks, until backfilled) sort first
+        return {"$or": [
+            {"rank": None, "_id": {"$gt": _id}},
+            {"rank": {"$type": "string"}},
+        ]}
+    return {"$or": [
+        {"rank": {"$gt": rank}},
+        {"rank": rank, "_id": {"$gt": _id}},
+    ]}
+
+KEYSET_SORT = [("updated_at", -1), ("_id", -1)]
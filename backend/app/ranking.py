@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import os
+from pymongo import UpdateOne
+from .database import db
+from .cache import issues_changed
+
+logger = logging.getLogger(__name__)
+
+# Keys longer than this (from repeated drops into the same gap) trigger a background rebalance
+RANK_MAX_LENGTH = int(os.getenv("RANK_MAX_LENGTH", "32"))
+RANK_SORT = [("rank", 1), ("_id", 1)]
+
+# Rank keys are base-62 strings compared byte-wise, so digits must be in ASCII order.
+# A key is an integer part, whose head letter encodes its length (a0, a1 ... az, b00 ...),
+# followed by an optional fraction; appending keeps keys short and inserting between
+# two neighbours only extends the fraction.
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+SMALLEST_INTEGER = "A" + "0" * 26
+ZERO = "a0"
+
+def _integer_length(head: str) -> int:
+    if "a" <= head <= "z":
+        return ord(head) - ord("a") + 2
+    if "A" <= head <= "Z":
+        return ord("Z") - ord(head) + 2
+    raise ValueError(f"Invalid rank key head: {head!r}")
+
+def _integer_part(key: str) -> str:
+    length = _integer_length(key[0])
+    if length > len(key):
+        raise ValueError(f"Invalid rank key: {key!r}")
+    return key[:length]
+
+def _increment(integer: str):
+    head, digits = integer[0], list(integer[1:])
+    for i in reversed(range(len(digits))):
+        d = DIGITS.index(digits[i]) + 1
+        if d < len(DIGITS):
+            digits[i] = DIGITS[d]
+            return head + "".join(digits)
+        digits[i] = DIGITS[0]
+    if head == "Z":
+        return "a" + DIGITS[0]
+    if head == "z":
+        return None
+    head = chr(ord(head) + 1)
+    if head > "a":
+        digits.append(DIGITS[0])
+    else:
+        digits.pop()
+    return head + "".join(digits)
+
+def _decrement(integer: str):
+    head, digits = integer[0], list(integer[1:])
+    for i in reversed(range(len(digits))):
+        d = DIGITS.index(digits[i]) - 1
+        if d >= 0:
+            digits[i] = DIGITS[d]
+            return head + "".join(digits)
+        digits[i] = DIGITS[-1]
+    if head == "a":
+        return "Z" + DIGITS[-1]
+    if head == "A":
+        return None
+    head = chr(ord(head) - 1)
+    if head < "Z":
+        digits.append(DIGITS[-1])
+    else:
+        digits.pop()
+    return head + "".join(digits)
+
+def _midpoint(a: str, b: str | None) -> str:
+    """A fraction strictly between fractions a and b (None: 1), without a trailing zero."""
+    if b is not None:
+        n = 0
+        while (a[n] if n < len(a) else DIGITS[0]) == b[n]:
+            n += 1
+        if n > 0:
+            return b[:n] + _midpoint(a[n:], b[n:])
+    digit_a = DIGITS.index(a[0]) if a else 0
+    digit_b = DIGITS.index(b[0]) if b is not None else len(DIGITS)
+    if digit_b - digit_a > 1:
+        return DIGITS[(digit_a + digit_b + 1) // 2]
+    if b is not None and len(b) > 1:
+        return b[:1]
+    return DIGITS[digit_a] + _midpoint(a[1:], None)
+
+def rank_between(a: str | None, b: str | None) -> str:
+    """A rank key that sorts after `a` and before `b`; None means the start/end of the column."""
+    if a is not None and b is not None and a >= b:
+        raise ValueError(f"Rank {a!r} is not before {b!r}")
+    if a is None:
+        if b is None:
+            return ZERO
+        ib = _integer_part(b)
+        if ib == SMALLEST_INTEGER:
+            return ib + _midpoint("", b[len(ib):])
+        if ib < b:
+            return ib
+        smaller = _decrement(ib)
+        if smaller is None:
+            raise ValueError("Rank keys exhausted at the start of the column")
+        return smaller
+    ia = _integer_part(a)
+    fa = a[len(ia):]
+    if b is None:
+        larger = _increment(ia)
+        return ia + _midpoint(fa, None) if larger is None else larger
+    ib = _integer_part(b)
+    if ia == ib:
+        return ia + _midpoint(fa, b[len(ib):])
+    larger = _increment(ia)
+    if larger is not None and larger < b:
+        return larger
+    return ia + _midpoint(fa, None)
+
+async def last_rank(project_id: str, status: str):
+    doc = await db.issues.find_one(
+        {"project_id": project_id, "status": status}, {"rank": 1}, sort=[("rank", -1), ("_id", -1)],
+    )
+    return doc.get("rank") if doc else None
+
+class RankAllocator:
+    """Hands out ranks at the end of each column for a batch of new issues."""
+
+    def __init__(self, project_id: str):
+        self.project_id = project_id
+        self.last = {}
+
+    async def next(self, status: str) -> str:
+        if status not in self.last:
+            self.last[status] = await last_rank(self.project_id, status)
+        rank = self.last[status] = rank_between(self.last[status], None)
+        return rank
+
+class RankRebalancer:
+    """Rewrites a column's ranks as short evenly spaced keys once drops have made them long."""
+
+    def __init__(self):
+        self.pending = set()
+        self.rebalanced = 0
+        self._wake = None
+        self._task = None
+
+    def schedule(self, project_id: str, status: str):
+        self.pending.add((project_id, status))
+        if self._wake is not None:
+            self._wake.set()
+
+    async def rebalance(self, project_id: str, status: str) -> int:
+        # Read the whole column first: rewriting ranks while walking the rank index would revisit documents
+        column = await db.issues.find({"project_id": project_id, "status": status}, {"rank": 1}).sort(RANK_SORT).to_list(length=None)
+        writes = []
+        rank = None
+        for doc in column:
+            rank = rank_between(rank, None)
+            if doc.get("rank") != rank:
+                # skipped if the card was moved meanwhile; that move already wrote a valid key
+                writes.append(UpdateOne({"_id": doc["_id"], "rank": doc.get("rank")}, {"$set": {"rank": rank}}))
+        for start in range(0, len(writes), 1000):
+            await db.issues.bulk_write(writes[start:start + 1000], ordered=False)
+        if writes:
+            await issues_changed(project_id)
+        return len(writes)
+
+    async def _run(self):
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            while self.pending:
+                project_id, status = self.pending.pop()
+                try:
+                    await self.rebalance(project_id, status)
+                    self.rebalanced += 1
+                except Exception:
+                    logger.exception("Failed to rebalance ranks of %s / %s", project_id, status)
+
+    async def start(self):
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {"pending": len(self.pending), "rebalanced": self.rebalanced}
+
+rank_rebalancer = RankRebalancer()
+
+async def _rebalance_all():
+    columns = 0
+    async for column in db.issues.aggregate([{"$group": {"_id": {"project_id": "$project_id", "status": "$status"}}}]):
+        await rank_rebalancer.rebalance(column["_id"]["project_id"], column["_id"]["status"])
+        columns += 1
+    return columns
+
+if __name__ == "__main__":
+    # python -m app.ranking  (from backend/) ranks issues created before ranks existed
+    print(f"Rebalanced {asyncio.run(_rebalance_all())} columns")
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import os
+from datetime import datetime
+from pymongo.errors import OperationFailure, PyMongoError
+from .database import db
+from .serializers import dumps, issue_out
+
+logger = logging.getLogger(__name__)
+
+# auto: use a change stream, falling back to polling when Mongo is not a replica set
+REALTIME_MODE = os.getenv("REALTIME_MODE", "auto")
+REALTIME_POLL_INTERVAL = float(os.getenv("REALTIME_POLL_INTERVAL", "1"))
+REALTIME_QUEUE_SIZE = int(os.getenv("REALTIME_QUEUE_SIZE", "256"))
+
+# "The $changeStream stage is only supported on replica sets"
+NOT_A_REPLICA_SET = 40573
+
+def encode_event(event: dict) -> str:
+    return dumps(event).decode()
+
+class IssueEventHub:
+    """One change stream (or poller) per process, fanned out to per-project subscriber queues."""
+
+    def __init__(self):
+        self.subscribers = {}
+        self.mode = None
+        # whether change stream delete events carry the pre-image that names their project
+        self.pre_images = False
+        self._task = None
+
+    def subscribe(self, project_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=REALTIME_QUEUE_SIZE)
+        self.subscribers.setdefault(project_id, set()).add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, project_id: str, queue: asyncio.Queue):
+        queues = self.subscribers.get(project_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[project_id]
+        if not self.subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def publish(self, project_id: str, event: dict):
+        for queue in list(self.subscribers.get(project_id, ())):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow consumer: drop its backlog and tell it to reload the board
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"type": "resync"})
+                self.subscribers[project_id].discard(queue)
+
+    def notify_deleted(self, project_id: str, issue_ids):
+        # Polling cannot see deletes, nor can a change stream without pre-images,
+        # so the local write path reports them
+        if self.mode != "changestream" or not self.pre_images:
+            for issue_id in issue_ids:
+                self.publish(project_id, {"type": "deleted", "id": str(issue_id)})
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        if REALTIME_MODE == "poll":
+            return await self._poll()
+        try:
+            await self._watch()
+        except OperationFailure as e:
+            if REALTIME_MODE != "auto" or e.code != NOT_A_REPLICA_SET:
+                raise
+            logger.info("Change streams unavailable, polling issues every %ss", REALTIME_POLL_INTERVAL)
+            await self._poll()
+
+    async def _watch(self):
+        try:
+            # Pre-images let delete events be routed to their project (MongoDB 6.0+)
+            await db.command("collMod", "issues", changeStreamPreAndPostImages={"enabled": True})
+            pre_images = True
+        except PyMongoError as e:
+            pre_images = False
+            logger.warning("Could not enable change stream pre-images on issues, only local deletes will be streamed: %s", e)
+
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete"]}}}]
+        resume_token = None
+        while True:
+            try:
+                options = {"full_document_before_change": "whenAvailable"} if pre_images else {}
+                async with db.issues.watch(
+                    pipeline,
+                    full_document="updateLookup",
+                    resume_after=resume_token,
+                    **options,
+                ) as stream:
+                    self.mode = "changestream"
+                    self.pre_images = pre_images
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        self._dispatch(change)
+            except OperationFailure as e:
+                if e.code == NOT_A_REPLICA_SET:
+                    raise
+                if pre_images and not self.pre_images:
+                    # never opened with pre-images: servers before 6.0 reject fullDocumentBeforeChange
+                    logger.warning("Issue change stream rejected pre-images, watching without them: %s", e)
+                    pre_images = False
+                    continue
+                # e.g. the resume point fell off the oplog; start from now
+                logger.warning("Issue change stream failed, restarting: %s", e)
+                resume_token = None
+                await asyncio.sleep(1)
+            except PyMongoError as e:
+                logger.warning("Issue change stream interrupted, resuming: %s", e)
+                await asyncio.sleep(1)
+
+    def _dispatch(self, change: dict):
+        if change["operationType"] == "delete":
+            before = change.get("fullDocumentBeforeChange")
+            if before:
+                self.publish(before["project_id"], {"type": "deleted", "id": str(change["documentKey"]["_id"])})
+            return
+        doc = change.get("fullDocument")
+        if doc:
+            event_type = "created" if change["operationType"] == "insert" else "updated"
+            self.publish(doc["project_id"], {"type": event_type, "issue": issue_out(doc)})
+
+    async def _poll(self):
+        self.mode = "poll"
+        since = datetime.utcnow()
+        while True:
+            await asyncio.sleep(REALTIME_POLL_INTERVAL)
+            if not self.subscribers:
+                continue
+            previous = since
+            cursor = db.issues.find({
+                "project_id": {"$in": list(self.subscribers)},
+                "updated_at": {"$gt": previous},
+            }).sort("updated_at", 1)
+            async for doc in cursor:
+                since = max(since, doc["updated_at"])
+                event_type = "created" if doc["created_at"] > previous else "updated"
+                self.publish(doc["project_id"], {"type": event_type, "issue": issue_out(doc)})
+
+issue_events = IssueEventHub()
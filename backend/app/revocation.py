@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from .database import db
+
+logger = logging.getLogger(__name__)
+
+REVOCATION_BLOOM_BITS = int(os.getenv("REVOCATION_BLOOM_BITS", str(1 << 20)))
+REVOCATION_BLOOM_HASHES = int(os.getenv("REVOCATION_BLOOM_HASHES", "7"))
+# How often to pull revocations made by other processes, and to rebuild the
+# filter from scratch so expired jtis stop counting towards false positives.
+REVOCATION_SYNC_SECONDS = float(os.getenv("REVOCATION_SYNC_SECONDS", "5"))
+REVOCATION_REBUILD_SECONDS = float(os.getenv("REVOCATION_REBUILD_SECONDS", "600"))
+
+class BloomFilter:
+    def __init__(self, size_bits: int, hashes: int):
+        self.size = size_bits
+        self.hashes = hashes
+        self.bits = bytearray((size_bits + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+class RevocationList:
+    """jti denylist: a bloom filter answers "definitely not revoked" without a
+    round-trip; only possible hits are confirmed against db.revoked_tokens,
+    whose TTL index removes entries once the token would have expired anyway.
+
+    The same collection holds per-user cutoffs ("sub:<email>" -> not_before),
+    which revoke every token of that user issued before a password reset."""
+
+    def __init__(self):
+        self.bloom = BloomFilter(REVOCATION_BLOOM_BITS, REVOCATION_BLOOM_HASHES)
+        self.synced_at = None
+        self.rebuilt_at = 0.0
+        self.checks = 0
+        self.lookups = 0
+        self._rebuilding = None
+        self._task = None
+
+    async def revoke(self, jti: str, expires_at: datetime):
+        now = datetime.utcnow()
+        await db.revoked_tokens.update_one(
+            {"_id": jti},
+            {"$setOnInsert": {"expires_at": expires_at, "revoked_at": now}},
+            upsert=True,
+        )
+        self.bloom.add(jti)
+        if self._rebuilding is not None:
+            self._rebuilding.add(jti)
+
+    async def revoke_subject(self, sub: str, expires_at: datetime):
+        """Revokes every token of `sub` issued before now; kept until `expires_at`,
+        when the last of them has expired anyway."""
+        key = f"sub:{sub}"
+        await db.revoked_tokens.update_one(
+            {"_id": key},
+            {"$max": {"not_before": int(time.time()), "expires_at": expires_at, "revoked_at": datetime.utcnow()}},
+            upsert=True,
+        )
+        self.bloom.add(key)
+        if self._rebuilding is not None:
+            self._rebuilding.add(key)
+
+    async def is_subject_revoked(self, sub: str, issued_at: float) -> bool:
+        key = f"sub:{sub}"
+        self.checks += 1
+        if key not in self.bloom:
+            return False
+        self.lookups += 1
+        cutoff = await db.revoked_tokens.find_one({"_id": key}, {"not_before": 1})
+        # iat has whole-second precision, so a token from the reset's own second stays valid
+        return cutoff is not None and issued_at < cutoff.get("not_before", 0)
+
+    async def is_revoked(self, jti: str | None) -> bool:
+        if jti is None:
+            return False
+        self.checks += 1
+        if jti not in self.bloom:
+            return False
+        self.lookups += 1
+        return await db.revoked_tokens.find_one({"_id": jti}, {"_id": 1}) is not None
+
+    async def sync(self):
+        now = datetime.utcnow()
+        if self.synced_at is None or time.monotonic() - self.rebuilt_at >= REVOCATION_REBUILD_SECONDS:
+            bloom = BloomFilter(REVOCATION_BLOOM_BITS, REVOCATION_BLOOM_HASHES)
+            query = {"expires_at": {"$gt": now}}
+            self._rebuilding = bloom
+            self.rebuilt_at = time.monotonic()
+        else:
+            bloom = self.bloom
+            # overlap a little to cover clock skew between processes
+            query = {"revoked_at": {"$gte": self.synced_at - timedelta(seconds=5)}}
+        try:
+            async for doc in db.revoked_tokens.find(query, {"_id": 1}):
+                bloom.add(doc["_id"])
+        finally:
+            self._rebuilding = None
+        self.bloom = bloom
+        self.synced_at = now
+
+    async def _sync_forever(self):
+        while True:
+            await asyncio.sleep(REVOCATION_SYNC_SECONDS)
+            try:
+                await self.sync()
+            except Exception:
+                logger.exception("Failed to sync token revocations")
+
+    async def start(self):
+        await self.sync()
+        self._task = asyncio.create_task(self._sync_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {"checks": self.checks, "db_lookups": self.lookups}
+
+revocations = RevocationList()
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, HTTPException, Depends, Request
 from ..models.user import UserCreate, UserOut
 from ..database import db
-from ..utils import hash_password, verify_password, create_access_token, get_current_user, create_reset_token, verify_reset_token
+from ..utils import ACCESS_TOKEN_EXPIRE_MINUTES, hash_password, verify_and_update_password, create_access_token, get_token_claims, create_reset_token, verify_reset_token
+from ..revocation import revocations
 from pydantic import BaseModel
-from datetime import timedelta
+from datetime import datetime, timedelta
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
@@ -25,11 +26,13 @@ async def register(user: UserCreate):
         if existing:
             raise HTTPException(status_code=400, detail="Email already registered")
 
-        hashed_pw = hash_password(user.password)
+        hashed_pw = await hash_password(user.password)
         user_dict = {"username": user.username, "email": user.email, "password": hashed_pw}
 
         result = await db.users.insert_one(user_dict)
         return {"id": str(result.inserted_id), "username": user.username, "email": user.email}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Registration failed: {str(e)}")
 
@@ -37,22 +40,30 @@ async def register(user: UserCreate):
 async def login(request: LoginRequest):
     try:
         user = await db.users.find_one({"email": request.email})
-        if not user or not verify_password(request.password, user["password"]):
+        if not user:
             raise HTTPException(status_code=401, detail="Invalid credentials")
+        valid, new_hash = await verify_and_update_password(request.password, user["password"])
+        if not valid:
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+        if new_hash:
+            await db.users.update_one({"_id": user["_id"]}, {"$set": {"password": new_hash}})
 
         token = create_access_token({"sub": user["email"]}, timedelta(minutes=30))
         return {"access_token": token, "token_type": "bearer"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Login failed: {str(e)}")
 
 
 @router.post("/logout")
-async def logout(current_user: str = Depends(get_current_user)):
+async def logout(claims: dict = Depends(get_token_claims)):
     """
-    For now, logout just confirms success. 
-    In future, we can add token blacklisting here.
+    Revokes the presented access token by its jti until it would have expired.
     """
     try:
+        if claims.get("jti"):
+            await revocations.revoke(claims["jti"], datetime.utcfromtimestamp(claims["exp"]))
         return {"message": "Logout successful"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Logout failed: {str(e)}")
@@ -68,8 +79,13 @@ async def forgot_password(request: ResetRequest):
 
 @router.post("/reset-password")
 async def reset_password(data: ResetPassword):
-    email = verify_reset_token(data.token)
-    hashed_pw = hash_password(data.new_password)
-    await db.users.update_one({"email": email}, {"$set": {"password": hashed_pw}})
+    claims = await verify_reset_token(data.token)
+    hashed_pw = await hash_password(data.new_password)
+    await db.users.update_one({"email": claims["sub"]}, {"$set": {"password": hashed_pw}})
+    # Sessions opened with the old password end here
+    await revocations.revoke_subject(claims["sub"], datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    # Reset tokens are single-use; ones issued before jtis existed simply expire
+    if claims.get("jti"):
+        await revocations.revoke(claims["jti"], datetime.utcfromtimestamp(claims["exp"]))
     return {"message": "Password reset successful"}
 
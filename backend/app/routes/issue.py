@@ -1,23 +1,62 @@
-from fastapi import APIRouter, Depends, HTTPException
-from ..models.issue import IssueCreate, IssueOut
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from ..models.issue import IssueCreate, IssueMove, IssueOut, IssuePartial, IssueSearchResult, BulkRequest, BulkResult, ImportResult
 from ..utils import get_current_user
-from ..database import db
+from ..database import db, read_db
+from ..cache import get_project_id, get_project_roles, issues_changed, project_ids
+from ..realtime import issue_events, encode_event
+from ..issue_keys import allocate_issue_numbers, format_issue_key, number_prefix_ranges, parse_issue_key
+from ..issue_io import EXPORT_FORMATS, export_chunks, read_records
+from ..activity import activity_log, diff
+from ..ranking import RANK_MAX_LENGTH, RANK_SORT, RankAllocator, last_rank, rank_between, rank_rebalancer
+from ..http_cache import make_etag, etag_matches, cache_headers, not_modified
+from ..serializers import ISSUE_FIELDS, FastJSONResponse, dumps, issue_out
+from ..singleflight import issue_list_reads
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, KEYSET_SORT, encode_cursor, keyset_filter, rank_filter
 from bson import ObjectId
+from pymongo import InsertOne, UpdateOne, DeleteOne, ReturnDocument
+from pymongo.errors import BulkWriteError
+from pydantic import ValidationError
 from datetime import datetime
-from typing import List
+from typing import List, Optional
+import asyncio
+import time
 
 router = APIRouter(prefix="/projects/{project_id}/issues", tags=["Issues"])
+# Project-independent lookups by issue key, e.g. GET /issues/SPR-123
+keys_router = APIRouter(prefix="/issues", tags=["Issues"])
+
+STREAM_KEEPALIVE = 15
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 50
+SEARCH_MAX_OFFSET = 1000
+SEARCH_MAX_KEY_MATCHES = 20
+EXPORT_BATCH_SIZE = 500
+IMPORT_BATCH_SIZE = 1000
+IMPORT_MAX_ERRORS = 100
 
 async def get_project_and_role(project_id: str, current_user: str):
-    project = await db.projects.find_one({"_id": ObjectId(project_id)})
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
+    project = await get_project_roles(project_id)
 
-    member = next((m for m in project["members"] if m["email"] == current_user), None)
-    if not member:
+    role = project["roles"].get(current_user)
+    if not role:
         raise HTTPException(status_code=403, detail="Not a member of this project")
 
-    return project, member["role"]
+    return project, role
+
+def update_denied(role: str, issue: dict, current_user: str):
+    if role == "Viewer":
+        return "Viewers cannot update issues"
+    if role == "Member" and issue["reporter"] != current_user and issue.get("assignee") != current_user:
+        return "Members can only update their own issues"
+    return None
+
+def delete_denied(role: str, issue: dict, current_user: str):
+    if role == "Viewer":
+        return "Viewers cannot delete issues"
+    if role == "Member" and issue["reporter"] != current_user:
+        return "Members can only delete issues they reported"
+    return None
 
 # Create issue
 @router.post("/", response_model=IssueOut)
@@ -28,6 +67,8 @@ async def create_issue(project_id: str, issue: IssueCreate, current_user: str =
 
     issue_dict = {
         "project_id": project_id,
+        "number": await allocate_issue_numbers(project_id),
+        "rank": rank_between(await last_rank(project_id, issue.status), None),
         "title": issue.title,
         "description": issue.description,
         "status": issue.status,
@@ -36,43 +77,216 @@ async def create_issue(project_id: str, issue: IssueCreate, current_user: str =
         "created_at": datetime.utcnow(),
         "updated_at": datetime.utcnow()
     }
-    result = await db.issues.insert_one(issue_dict)
-    return {"id": str(result.inserted_id), **issue_dict}
+    await db.issues.insert_one(issue_dict)
+    await issues_changed(project_id)
+    activity_log.record(
+        project_id, current_user, "issue.created",
+        issue_id=str(issue_dict["_id"]), issue_key=format_issue_key(project["key"], issue_dict["number"]), changes=diff({}, issue_dict),
+    )
+    return issue_out(issue_dict, project_key=project["key"])
 
 # List issues
-@router.get("/", response_model=List[IssueOut])
-async def list_issues(project_id: str, current_user: str = Depends(get_current_user)):
+@router.get("/", response_model=List[IssuePartial], response_model_exclude_unset=True)
+async def list_issues(
+    project_id: str,
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    assignee: Optional[str] = None,
+    reporter: Optional[str] = None,
+    updated_since: Optional[datetime] = None,
+    fields: Optional[str] = None,
+    sort: str = Query("updated", pattern="^(updated|rank)$"),
+    current_user: str = Depends(get_current_user),
+):
+    project, role = await get_project_and_role(project_id, current_user)
+    # Rank order only exists within a column, and one column is one index range
+    if sort == "rank" and not status:
+        raise HTTPException(status_code=400, detail="sort=rank requires status")
+
+    # The project version changes on every issue write, so an unchanged version
+    # means the page is unchanged and the issues need not be read at all. It is
+    # read by every caller, never shared, so a caller sees its own writes.
+    versioned = await read_db.projects.find_one({"_id": ObjectId(project_id)}, {"version": 1})
+    version = (versioned or {}).get("version", 0)
+    params = sorted(request.query_params.multi_items())
+    etag = make_etag("issues", project_id, version, params)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    headers = cache_headers(etag)
+
+    by_rank = sort == "rank"
+    query = {"project_id": project_id, **(rank_filter(cursor) if by_rank else keyset_filter(cursor))}
+    if status:
+        query["status"] = status
+    if assignee:
+        query["assignee"] = assignee
+    if reporter:
+        query["reporter"] = reporter
+    if updated_since:
+        query["updated_at"] = {"$gte": updated_since}
+
+    selected = ISSUE_FIELDS
+    if fields:
+        selected = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = set(selected) - set(ISSUE_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    # the sort field is always fetched because the next cursor is built from it
+    sort_field = "rank" if by_rank else "updated_at"
+    projection = {f: 1 for f in selected}
+    projection[sort_field] = 1
+
+    async def load_page():
+        issues = await read_db.issues.find(query, projection).sort(RANK_SORT if by_rank else KEYSET_SORT).limit(limit).to_list(length=limit)
+        next_cursor = None
+        if len(issues) == limit:
+            next_cursor = encode_cursor(issues[-1].get(sort_field), issues[-1]["_id"])
+        return dumps([issue_out(i, selected, project["key"]) for i in issues]), next_cursor
+
+    page = await issue_list_reads.do(("page", project_id, version, tuple(params)), load_page)
+    body, next_cursor = page.value
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return Response(body, media_type="application/json", headers=headers)
+
+# Search issues
+@router.get("/search", response_model=List[IssueSearchResult])
+async def search_issues(
+    project_id: str,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=SEARCH_MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0, le=SEARCH_MAX_OFFSET),
+    current_user: str = Depends(get_current_user),
+):
     project, role = await get_project_and_role(project_id, current_user)
 
-    cursor = db.issues.find({"project_id": project_id})
-    issues = []
-    async for i in cursor:
-        issues.append({
-            "id": str(i["_id"]),
-            "project_id": i["project_id"],
-            "title": i["title"],
-            "description": i.get("description"),
-            "status": i["status"],
-            "reporter": i["reporter"],
-            "assignee": i.get("assignee"),
-            "created_at": i["created_at"],
-            "updated_at": i["updated_at"]
+    # "SPR-1" or "1" matches issue keys by prefix (SPR-1, SPR-10 ... SPR-19, SPR-100 ...).
+    # Key matches rank above every text match and are left out of the text query;
+    # offsets count through the key matches first, then the text matches.
+    key_matches = []
+    parsed = parse_issue_key(f"{project['key']}-{q}" if q.isdigit() else q)
+    if parsed and parsed[0] == project["key"]:
+        key_matches = await read_db.issues.find(
+            {"project_id": project_id, "$or": number_prefix_ranges(parsed[1])},
+        ).sort("number", 1).limit(SEARCH_MAX_KEY_MATCHES).to_list(length=SEARCH_MAX_KEY_MATCHES)
+    page_keys = key_matches[offset:offset + limit]
+
+    results = []
+    text_query = {"project_id": project_id, "$text": {"$search": q}}
+    if key_matches:
+        text_query["_id"] = {"$nin": [i["_id"] for i in key_matches]}
+    if len(page_keys) < limit:
+        results_cursor = read_db.issues.find(
+            text_query, {"score": {"$meta": "textScore"}},
+        ).sort([("score", {"$meta": "textScore"}), ("_id", -1)]).skip(max(0, offset - len(key_matches))).limit(limit - len(page_keys))
+        async for i in results_cursor:
+            results.append({**issue_out(i, project_key=project["key"]), "score": i["score"]})
+
+    top = max((r["score"] for r in results), default=0.0)
+    results = [
+        {**issue_out(i, project_key=project["key"]), "score": top + len(page_keys) - n}
+        for n, i in enumerate(page_keys)
+    ] + results
+
+    headers = {}
+    if len(results) == limit and offset + limit <= SEARCH_MAX_OFFSET:
+        headers["X-Next-Offset"] = str(offset + limit)
+    return FastJSONResponse(results, headers=headers)
+
+# Export issues as NDJSON or CSV, streamed straight from the cursor
+@router.get("/export")
+async def export_issues(
+    project_id: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    current_user: str = Depends(get_current_user),
+):
+    project, role = await get_project_and_role(project_id, current_user)
+    # Oldest first (the list index read backwards), so a re-import numbers issues in the same order
+    cursor = read_db.issues.find({"project_id": project_id}).sort([("updated_at", 1), ("_id", 1)]).batch_size(EXPORT_BATCH_SIZE)
+    return StreamingResponse(
+        export_chunks(cursor, format, project["key"], EXPORT_BATCH_SIZE),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{project["key"]}-issues.{format}"'},
+    )
+
+# Import issues from a raw NDJSON or CSV request body (same columns as the export)
+@router.post("/import", response_model=ImportResult)
+async def import_issues(
+    project_id: str,
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    current_user: str = Depends(get_current_user),
+):
+    project, role = await get_project_and_role(project_id, current_user)
+    if role != "Admin":
+        raise HTTPException(status_code=403, detail="Only Admins can import issues")
+
+    imported = 0
+    failed = 0
+    errors = []
+    batch = []
+    batch_lines = []
+    ranks = RankAllocator(project_id)
+
+    def fail(line, detail):
+        nonlocal failed
+        failed += 1
+        if len(errors) < IMPORT_MAX_ERRORS:
+            errors.append({"line": line, "detail": detail})
+
+    async def flush():
+        nonlocal imported
+        number = await allocate_issue_numbers(project_id, len(batch))
+        for n, doc in enumerate(batch):
+            doc["number"] = number + n
+        try:
+            result = await db.issues.insert_many(batch, ordered=False)
+            imported += len(result.inserted_ids)
+        except BulkWriteError as e:
+            imported += e.details.get("nInserted", 0)
+            for error in e.details.get("writeErrors", []):
+                fail(batch_lines[error["index"]], error.get("errmsg", "Write failed"))
+        batch.clear()
+        batch_lines.clear()
+
+    async for line, row in read_records(request.stream(), format):
+        if isinstance(row, str):
+            fail(line, row)
+            continue
+        try:
+            issue = IssueCreate.model_validate(row)
+        except ValidationError as e:
+            fail(line, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+            continue
+        now = datetime.utcnow()
+        batch.append({
+            "project_id": project_id,
+            "rank": await ranks.next(issue.status),
+            "title": issue.title,
+            "description": issue.description,
+            "status": issue.status,
+            "reporter": current_user,
+            "assignee": issue.assignee,
+            "created_at": now,
+            "updated_at": now
         })
-    return issues
+        batch_lines.append(line)
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await flush()
+    if batch:
+        await flush()
+
+    if imported:
+        await issues_changed(project_id)
+        activity_log.record(project_id, current_user, "issues.imported", count=imported)
+    return {"imported": imported, "failed": failed, "errors": errors}
 
 # Update issue
 @router.put("/{issue_id}", response_model=IssueOut)
 async def update_issue(project_id: str, issue_id: str, data: IssueCreate, current_user: str = Depends(get_current_user)):
     project, role = await get_project_and_role(project_id, current_user)
-    issue = await db.issues.find_one({"_id": ObjectId(issue_id), "project_id": project_id})
-    if not issue:
-        raise HTTPException(status_code=404, detail="Issue not found")
-
-    # Role enforcement
-    if role == "Viewer":
-        raise HTTPException(status_code=403, detail="Viewers cannot update issues")
-    if role == "Member" and issue["reporter"] != current_user and issue.get("assignee") != current_user:
-        raise HTTPException(status_code=403, detail="Members can only update their own issues")
 
     update_data = {
         "title": data.title,
@@ -81,20 +295,97 @@ async def update_issue(project_id: str, issue_id: str, data: IssueCreate, curren
         "assignee": data.assignee,
         "updated_at": datetime.utcnow()
     }
-    await db.issues.update_one({"_id": ObjectId(issue_id)}, {"$set": update_data})
-
-    updated = await db.issues.find_one({"_id": ObjectId(issue_id)})
-    return {
-        "id": str(updated["_id"]),
-        "project_id": updated["project_id"],
-        "title": updated["title"],
-        "description": updated.get("description"),
-        "status": updated["status"],
-        "reporter": updated["reporter"],
-        "assignee": updated.get("assignee"),
-        "created_at": updated["created_at"],
-        "updated_at": updated["updated_at"]
-    }
+    # Role enforcement lives in the filter so the check and the write are atomic
+    query = {"_id": ObjectId(issue_id), "project_id": project_id}
+    if role == "Member":
+        query["$or"] = [{"reporter": current_user}, {"assignee": current_user}]
+    before = None
+    if role != "Viewer":
+        # The pre-image feeds the activity log; the result is the pre-image plus the $set
+        before = await db.issues.find_one_and_update(query, {"$set": update_data}, return_document=ReturnDocument.BEFORE)
+
+    if not before:
+        issue = await db.issues.find_one({"_id": ObjectId(issue_id), "project_id": project_id}, {"reporter": 1, "assignee": 1})
+        if not issue:
+            raise HTTPException(status_code=404, detail="Issue not found")
+        denied = update_denied(role, issue, current_user)
+        if denied:
+            raise HTTPException(status_code=403, detail=denied)
+        raise HTTPException(status_code=409, detail="Issue changed concurrently, please retry")
+
+    updated = {**before, **update_data}
+    if before["status"] != data.status:
+        # The old column's rank means nothing in the new one; append to the bottom instead,
+        # unless a move has placed the issue meanwhile
+        rank = rank_between(await last_rank(project_id, data.status), None)
+        result = await db.issues.update_one(
+            {"_id": before["_id"], "status": data.status, "rank": before.get("rank")}, {"$set": {"rank": rank}},
+        )
+        if result.modified_count:
+            updated["rank"] = rank
+    await issues_changed(project_id)
+    activity_log.record(
+        project_id, current_user, "issue.updated",
+        issue_id=issue_id, issue_key=format_issue_key(project["key"], updated.get("number")), changes=diff(before, updated),
+    )
+    return issue_out(updated, project_key=project["key"])
+
+# Move issue between two neighbours (drag and drop); only the moved issue is written
+@router.post("/{issue_id}/move", response_model=IssueOut)
+async def move_issue(project_id: str, issue_id: str, move: IssueMove, current_user: str = Depends(get_current_user)):
+    project, role = await get_project_and_role(project_id, current_user)
+    issue = await db.issues.find_one({"_id": ObjectId(issue_id), "project_id": project_id})
+    if not issue:
+        raise HTTPException(status_code=404, detail="Issue not found")
+    denied = update_denied(role, issue, current_user)
+    if denied:
+        raise HTTPException(status_code=403, detail=denied)
+
+    status = move.status or issue["status"]
+    column = {"project_id": project_id, "status": status, "_id": {"$ne": issue["_id"]}}
+    neighbour_ids = [i for i in (move.after_id, move.before_id) if i]
+    neighbours = {}
+    if neighbour_ids:
+        if not all(ObjectId.is_valid(i) for i in neighbour_ids):
+            raise HTTPException(status_code=400, detail="Invalid neighbour id")
+        others = [ObjectId(i) for i in neighbour_ids if i != issue_id]
+        async for n in db.issues.find({**column, "_id": {"$in": others}}, {"rank": 1}):
+            neighbours[str(n["_id"])] = n.get("rank")
+        if len(neighbours) != len(set(neighbour_ids)):
+            raise HTTPException(status_code=400, detail=f"Neighbours must be other issues in the {status} column")
+
+    after = neighbours.get(move.after_id)
+    before = neighbours.get(move.before_id)
+    # With one neighbour given, the other side is whatever is adjacent to it now
+    if move.after_id and not move.before_id and after is not None:
+        following = await db.issues.find_one({**column, "rank": {"$gt": after}}, {"rank": 1}, sort=RANK_SORT)
+        before = following["rank"] if following else None
+    elif move.before_id and not move.after_id and before is not None:
+        preceding = await db.issues.find_one({**column, "rank": {"$lt": before}}, {"rank": 1}, sort=[("rank", -1), ("_id", -1)])
+        after = preceding["rank"] if preceding else None
+    elif not neighbour_ids:
+        last = await db.issues.find_one(column, {"rank": 1}, sort=[("rank", -1), ("_id", -1)])
+        after = last.get("rank") if last else None
+
+    if None in neighbours.values() or (after is not None and before is not None and after >= before):
+        # unranked or tied neighbours (concurrent drops); even the column out and let the client retry
+        rank_rebalancer.schedule(project_id, status)
+        raise HTTPException(status_code=409, detail="Column order changed, please reload and retry")
+
+    update_data = {"rank": rank_between(after, before), "status": status, "updated_at": datetime.utcnow()}
+    result = await db.issues.update_one({"_id": issue["_id"], "project_id": project_id}, {"$set": update_data})
+    if not result.matched_count:
+        raise HTTPException(status_code=404, detail="Issue not found")
+    if len(update_data["rank"]) > RANK_MAX_LENGTH:
+        rank_rebalancer.schedule(project_id, status)
+
+    updated = {**issue, **update_data}
+    await issues_changed(project_id)
+    activity_log.record(
+        project_id, current_user, "issue.moved",
+        issue_id=issue_id, issue_key=format_issue_key(project["key"], updated.get("number")), changes=diff(issue, updated),
+    )
+    return issue_out(updated, project_key=project["key"])
 
 # Delete issue
 @router.delete("/{issue_id}")
@@ -105,10 +396,204 @@ async def delete_issue(project_id: str, issue_id: str, current_user: str = Depen
         raise HTTPException(status_code=404, detail="Issue not found")
 
     # Role enforcement
-    if role == "Viewer":
-        raise HTTPException(status_code=403, detail="Viewers cannot delete issues")
-    if role == "Member" and issue["reporter"] != current_user:
-        raise HTTPException(status_code=403, detail="Members can only delete issues they reported")
+    denied = delete_denied(role, issue, current_user)
+    if denied:
+        raise HTTPException(status_code=403, detail=denied)
 
     await db.issues.delete_one({"_id": ObjectId(issue_id)})
+    await issues_changed(project_id)
+    issue_events.notify_deleted(project_id, [issue_id])
+    activity_log.record(
+        project_id, current_user, "issue.deleted",
+        issue_id=issue_id, issue_key=format_issue_key(project["key"], issue.get("number")), changes=diff(issue, {}),
+    )
     return {"message": "Issue deleted successfully"}
+
+# Live issue events (Server-Sent Events)
+@router.get("/stream")
+async def stream_issues(project_id: str, request: Request, current_user: str = Depends(get_current_user)):
+    project, role = await get_project_and_role(project_id, current_user)
+    queue = issue_events.subscribe(project_id)
+
+    async def still_member():
+        try:
+            project = await get_project_roles(project_id)
+        except HTTPException:
+            return False   # deleted or being deleted
+        return project["roles"].get(current_user) is not None
+
+    async def events():
+        # Membership is re-checked at most every STREAM_KEEPALIVE seconds, so removed
+        # members and deleted projects stop receiving issues on open connections too
+        checked = time.monotonic()
+        try:
+            yield ": connected\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    event = None
+                if time.monotonic() - checked >= STREAM_KEEPALIVE:
+                    if not await still_member():
+                        break
+                    checked = time.monotonic()
+                if event is None:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {encode_event(event)}\n\n"
+                if event["type"] == "resync":
+                    break
+        finally:
+            issue_events.unsubscribe(project_id, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# Bulk create / update / transition / delete
+@router.post(":bulk", response_model=List[BulkResult], response_model_exclude_none=True)
+async def bulk_issues(project_id: str, request: BulkRequest, current_user: str = Depends(get_current_user)):
+    project, role = await get_project_and_role(project_id, current_user)
+    operations = request.operations
+    results = [{"index": n, "op": op.op, "id": op.issue_id, "code": 200} for n, op in enumerate(operations)]
+
+    def fail(n, code, detail):
+        results[n].update(code=code, detail=detail)
+
+    # Load every referenced issue in one query for the permission checks and activity diffs
+    ids = {op.issue_id for op in operations if op.op != "create" and op.issue_id and ObjectId.is_valid(op.issue_id)}
+    issues = {}
+    if ids:
+        async for i in db.issues.find(
+            {"_id": {"$in": [ObjectId(issue_id) for issue_id in ids]}, "project_id": project_id},
+            {"number": 1, "title": 1, "description": 1, "status": 1, "reporter": 1, "assignee": 1},
+        ):
+            issues[str(i["_id"])] = i
+
+    # Number every create that will be attempted with a single counter update
+    creates = 0
+    if role in ["Admin", "Member"]:
+        creates = sum(1 for op in operations if op.op == "create" and op.data is not None)
+    number = await allocate_issue_numbers(project_id, creates) if creates else None
+    ranks = RankAllocator(project_id)
+
+    now = datetime.utcnow()
+    writes = []
+    write_index = []
+    # (operation index, action, issue before, issue after) for the activity log
+    changes = []
+    for n, op in enumerate(operations):
+        if op.op == "create":
+            if role not in ["Admin", "Member"]:
+                fail(n, 403, "Only Admins and Members can create issues")
+                continue
+            if op.data is None:
+                fail(n, 400, "create requires data")
+                continue
+            _id = ObjectId()
+            results[n]["id"] = str(_id)
+            doc = {
+                "_id": _id,
+                "project_id": project_id,
+                "number": number,
+                "rank": await ranks.next(op.data.status),
+                "title": op.data.title,
+                "description": op.data.description,
+                "status": op.data.status,
+                "reporter": current_user,
+                "assignee": op.data.assignee,
+                "created_at": now,
+                "updated_at": now
+            }
+            writes.append(InsertOne(doc))
+            write_index.append(n)
+            changes.append((n, "issue.created", {}, doc))
+            number += 1
+            continue
+
+        issue = issues.get(op.issue_id)
+        if issue is None:
+            fail(n, 404, "Issue not found")
+            continue
+
+        if op.op == "delete":
+            denied = delete_denied(role, issue, current_user)
+            if denied:
+                fail(n, 403, denied)
+                continue
+            writes.append(DeleteOne({"_id": issue["_id"], "project_id": project_id}))
+            write_index.append(n)
+            changes.append((n, "issue.deleted", issue, {}))
+            continue
+
+        denied = update_denied(role, issue, current_user)
+        if denied:
+            fail(n, 403, denied)
+            continue
+        if op.op == "update":
+            if op.data is None:
+                fail(n, 400, "update requires data")
+                continue
+            update_data = {
+                "title": op.data.title,
+                "description": op.data.description,
+                "status": op.data.status,
+                "assignee": op.data.assignee,
+                "updated_at": now
+            }
+        else:
+            if op.status is None:
+                fail(n, 400, "transition requires status")
+                continue
+            update_data = {"status": op.status, "updated_at": now}
+        if update_data["status"] != issue["status"]:
+            update_data["rank"] = await ranks.next(update_data["status"])
+        writes.append(UpdateOne({"_id": issue["_id"], "project_id": project_id}, {"$set": update_data}))
+        write_index.append(n)
+        changes.append((n, "issue.updated", issue, {**issue, **update_data}))
+
+    if writes:
+        try:
+            await db.issues.bulk_write(writes, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                fail(write_index[error["index"]], 500, error.get("errmsg", "Write failed"))
+        await issues_changed(project_id)
+    issue_events.notify_deleted(project_id, [r["id"] for r in results if r["op"] == "delete" and r["code"] == 200])
+    for n, action, before, after in changes:
+        if results[n]["code"] == 200:
+            activity_log.record(
+                project_id, current_user, action,
+                issue_id=results[n]["id"], issue_key=format_issue_key(project["key"], (after or before).get("number")),
+                changes=diff(before, after),
+            )
+    return results
+
+# Get issue by key
+@keys_router.get("/{issue_key}", response_model=IssueOut)
+async def get_issue_by_key(issue_key: str, current_user: str = Depends(get_current_user)):
+    parsed = parse_issue_key(issue_key)
+    if parsed is None:
+        raise HTTPException(status_code=400, detail="Invalid issue key, expected e.g. SPR-123")
+    project_key, number = parsed
+
+    # Resolve the key before checking membership: the cached mapping may point at a
+    # project that has since been renamed or deleted, and that must not decide the answer
+    project_id = await get_project_id(project_key)
+    try:
+        cached_key = (await get_project_roles(project_id))["key"]
+    except HTTPException:
+        cached_key = None
+    if cached_key != project_key:
+        project_ids.invalidate(project_key)
+        project_id = await get_project_id(project_key)
+    project, role = await get_project_and_role(project_id, current_user)
+
+    issue = await db.issues.find_one({"project_id": project_id, "number": number})
+    if not issue:
+        raise HTTPException(status_code=404, detail="Issue not found")
+    return issue_out(issue, project_key=project_key)
@@ -1,13 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from ..models.project import ProjectCreate, ProjectOut, Member
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from ..models.project import ProjectCreate, ProjectOut, ProjectDetail, Member, ProjectSummary, ProjectDeletion, Activity
 from ..utils import get_current_user
-from ..database import db
+from ..database import db, read_db
+from ..cache import ACTIVE, get_project_roles, project_ids, project_roles, project_summaries
+from ..deletion import project_deletions
+from ..http_cache import make_etag, etag_matches, cache_headers, not_modified
+from ..serializers import FastJSONResponse, activity_out, deletion_out, dumps, issue_out, project_out
+from ..singleflight import project_reads
+from ..activity import activity_log
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, encode_cursor, keyset_filter
 from bson import ObjectId
-from typing import List
-from datetime import datetime
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from typing import List, Optional
+from datetime import datetime, timedelta
 
 router = APIRouter(prefix="/projects", tags=["Projects"])
 
+RECENT_ISSUES = 10
+
+async def require_admin(project_id: str, current_user: str, detail: str):
+    """Explain why a guarded update matched nothing: 404 if the project is gone, 403 if not an Admin."""
+    project = await get_project_roles(project_id)
+    if project["roles"].get(current_user) != "Admin":
+        raise HTTPException(status_code=403, detail=detail)
+    return project
+
 # Create project
 @router.post("/", response_model=ProjectOut)
 async def create_project(project: ProjectCreate, current_user: str = Depends(get_current_user)):
@@ -26,29 +44,30 @@ async def create_project(project: ProjectCreate, current_user: str = Depends(get
             "members": [{"email": current_user, "role": "Admin"}],
             "created_at": datetime.utcnow()
         }
-        result = await db.projects.insert_one(project_dict)
-        return {"id": str(result.inserted_id), **project_dict}
+        await db.projects.insert_one(project_dict)
+        return project_out(project_dict)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create project: {str(e)}")
 
 # List projects
 @router.get("/", response_model=List[ProjectOut])
-async def list_projects(current_user: str = Depends(get_current_user)):
+async def list_projects(request: Request, current_user: str = Depends(get_current_user)):
     try:
-        projects_cursor = db.projects.find({"members.email": current_user})
+        projects_cursor = read_db.projects.find({"members.email": current_user, **ACTIVE})
         projects = []
+        versions = []
         async for p in projects_cursor:
-            projects.append({
-                "id": str(p["_id"]),
-                "name": p["name"],
-                "key": p["key"],
-                "description": p.get("description"),
-                "type": p["type"],
-                "owner": p["owner"],
-                "members": p.get("members", []),
-                "created_at": p["created_at"]
-            })
-        return projects
+            versions.append((str(p["_id"]), p.get("version", 0)))
+            projects.append(project_out(p))
+
+        etag = make_etag("projects", *sorted(versions))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        return FastJSONResponse(projects, headers=cache_headers(etag))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch projects: {str(e)}")
 
@@ -56,39 +75,27 @@ async def list_projects(current_user: str = Depends(get_current_user)):
 @router.post("/{project_id}/members", response_model=ProjectOut)
 async def add_member(project_id: str, member: Member, current_user: str = Depends(get_current_user)):
     try:
-        project = await db.projects.find_one({"_id": ObjectId(project_id)})
-        if not project:
-            raise HTTPException(status_code=404, detail="Project not found")
-
-        # Only Admins can add members
-        admin = next((m for m in project["members"] if m["email"] == current_user and m["role"] == "Admin"), None)
-        if not admin:
-            raise HTTPException(status_code=403, detail="Only Admins can add members")
-
-        # Check if user already exists
-        if any(m["email"] == member.email for m in project["members"]):
-            raise HTTPException(status_code=400, detail="User already a member")
-
-        await db.projects.update_one(
-            {"_id": ObjectId(project_id)},
-            {"$push": {"members": {"email": member.email, "role": member.role}}}
+        # Only Admins can add members, and only users who aren't members yet
+        before = await db.projects.find_one_and_update(
+            {
+                "_id": ObjectId(project_id),
+                **ACTIVE,
+                "members": {"$elemMatch": {"email": current_user, "role": "Admin"}},
+                "members.email": {"$ne": member.email},
+            },
+            {"$push": {"members": {"email": member.email, "role": member.role}}, "$inc": {"version": 1}},
+            return_document=ReturnDocument.BEFORE,
         )
+        project_roles.invalidate(project_id)
+        if not before:
+            await require_admin(project_id, current_user, "Only Admins can add members")
+            raise HTTPException(status_code=400, detail="User already a member")
 
-        updated = await db.projects.find_one({"_id": ObjectId(project_id)})
-        if not updated:
-            raise HTTPException(status_code=404, detail="Project not found")
-
-        return {
-            "id": str(updated["_id"]),
-            "name": updated["name"],
-            "key": updated["key"],
-            "description": updated.get("description"),
-            "type": updated["type"],
-            "owner": updated["owner"],
-            "members": updated.get("members", []),
-            "created_at": updated["created_at"],
-        }
+        activity_log.record(project_id, current_user, "member.added", member=member.email, changes={"role": {"old": None, "new": member.role}})
+        return project_out({**before, "members": before["members"] + [{"email": member.email, "role": member.role}]})
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to add member: {str(e)}")
 
@@ -96,36 +103,30 @@ async def add_member(project_id: str, member: Member, current_user: str = Depend
 @router.patch("/{project_id}/members/{email}", response_model=ProjectOut)
 async def update_member_role(project_id: str, email: str, role: str, current_user: str = Depends(get_current_user)):
     try:
-        project = await db.projects.find_one({"_id": ObjectId(project_id)})
-        if not project:
-            raise HTTPException(status_code=404, detail="Project not found")
-
-        admin = next((m for m in project["members"] if m["email"] == current_user and m["role"] == "Admin"), None)
-        if not admin:
-            raise HTTPException(status_code=403, detail="Only Admins can update roles")
-
-        result = await db.projects.update_one(
-            {"_id": ObjectId(project_id), "members.email": email},
-            {"$set": {"members.$.role": role}}
+        before = await db.projects.find_one_and_update(
+            {
+                "_id": ObjectId(project_id),
+                **ACTIVE,
+                "members": {"$elemMatch": {"email": current_user, "role": "Admin"}},
+                "members.email": email,
+            },
+            {"$set": {"members.$[member].role": role}, "$inc": {"version": 1}},
+            array_filters=[{"member.email": email}],
+            return_document=ReturnDocument.BEFORE,
         )
-        if result.modified_count == 0:
+        project_roles.invalidate(project_id)
+        if not before:
+            await require_admin(project_id, current_user, "Only Admins can update roles")
             raise HTTPException(status_code=404, detail="Member not found")
 
-        updated = await db.projects.find_one({"_id": ObjectId(project_id)})
-        if not updated:
-            raise HTTPException(status_code=404, detail="Project not found")
-
-        return {
-            "id": str(updated["_id"]),
-            "name": updated["name"],
-            "key": updated["key"],
-            "description": updated.get("description"),
-            "type": updated["type"],
-            "owner": updated["owner"],
-            "members": updated.get("members", []),
-            "created_at": updated["created_at"],
-        }
+        old_role = next(m["role"] for m in before["members"] if m["email"] == email)
+        if old_role != role:
+            activity_log.record(project_id, current_user, "member.role_changed", member=email, changes={"role": {"old": old_role, "new": role}})
+        members = [{**m, "role": role} if m["email"] == email else m for m in before["members"]]
+        return project_out({**before, "members": members})
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update member role: {str(e)}")
 
@@ -133,82 +134,136 @@ async def update_member_role(project_id: str, email: str, role: str, current_use
 @router.delete("/{project_id}/members/{email}", response_model=ProjectOut)
 async def remove_member(project_id: str, email: str, current_user: str = Depends(get_current_user)):
     try:
-        project = await db.projects.find_one({"_id": ObjectId(project_id)})
-        if not project:
-            raise HTTPException(status_code=404, detail="Project not found")
-
-        admin = next((m for m in project["members"] if m["email"] == current_user and m["role"] == "Admin"), None)
-        if not admin:
-            raise HTTPException(status_code=403, detail="Only Admins can remove members")
-
-        await db.projects.update_one(
-            {"_id": ObjectId(project_id)},
-            {"$pull": {"members": {"email": email}}}
+        before = await db.projects.find_one_and_update(
+            {"_id": ObjectId(project_id), **ACTIVE, "members": {"$elemMatch": {"email": current_user, "role": "Admin"}}},
+            {"$pull": {"members": {"email": email}}, "$inc": {"version": 1}},
+            return_document=ReturnDocument.BEFORE,
         )
-
-        updated = await db.projects.find_one({"_id": ObjectId(project_id)})
-        if not updated:
-            raise HTTPException(status_code=404, detail="Project not found")
-
-        return {
-            "id": str(updated["_id"]),
-            "name": updated["name"],
-            "key": updated["key"],
-            "description": updated.get("description"),
-            "type": updated["type"],
-            "owner": updated["owner"],
-            "members": updated.get("members", []),
-            "created_at": updated["created_at"],
-        }
+        project_roles.invalidate(project_id)
+        if not before:
+            await require_admin(project_id, current_user, "Only Admins can remove members")
+            raise HTTPException(status_code=409, detail="Project changed concurrently, please retry")
+
+        removed = next((m for m in before["members"] if m["email"] == email), None)
+        if removed:
+            activity_log.record(project_id, current_user, "member.removed", member=email, changes={"role": {"old": removed["role"], "new": None}})
+        return project_out({**before, "members": [m for m in before["members"] if m["email"] != email]})
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to remove member: {str(e)}")
 
 
-@router.get("/{project_id}", response_model=ProjectOut)
-async def get_project(project_id: str, current_user: str = Depends(get_current_user)):
+@router.get("/{project_id}", response_model=ProjectDetail)
+async def get_project(project_id: str, request: Request, current_user: str = Depends(get_current_user)):
     try:
-        project = await db.projects.find_one({"_id": ObjectId(project_id), "members.email": current_user})
-        if not project:
+        # Concurrent opens of the same project version share one read and one rendered
+        # body per role; the version is read per caller so it reflects the caller's writes
+        versioned = await db.projects.find_one({"_id": ObjectId(project_id), **ACTIVE}, {"version": 1})
+        if not versioned:
             raise HTTPException(status_code=404, detail="Project not found or access denied")
-        member = next((m for m in project["members"] if m["email"] == current_user), None)
-        role = member["role"] if member else "Viewer"
-
-        project["_id"] = str(project["_id"])
-        
-        return {
-            "id": str(project["_id"]),
-            "name": project["name"],
-            "key": project["key"],
-            "description": project.get("description"),
-            "type": project["type"],
-            "owner": project["owner"],
-            "members": project.get("members", []),
-            "created_at": project["created_at"],
-            "current_user_role": role   # 🔹 new
-        }
+        shared = await project_reads.do(
+            (project_id, versioned.get("version", 0)),
+            lambda: db.projects.find_one({"_id": ObjectId(project_id), **ACTIVE}),
+        )
+        project = shared.value
+        member = next((m for m in (project or {}).get("members", []) if m["email"] == current_user), None)
+        if not member:
+            raise HTTPException(status_code=404, detail="Project not found or access denied")
+        role = member["role"]
+
+        etag = make_etag("project", project_id, project.get("version", 0), role)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        body = shared.body(role, lambda: dumps({**project_out(project), "current_user_role": role}))
+        return Response(body, media_type="application/json", headers=cache_headers(etag))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch project: {str(e)}")
-    
+
+
+# Project summary
+@router.get("/{project_id}/summary", response_model=ProjectSummary)
+async def get_project_summary(project_id: str, current_user: str = Depends(get_current_user)):
+    project = await get_project_roles(project_id)
+    if current_user not in project["roles"]:
+        raise HTTPException(status_code=403, detail="Not a member of this project")
+
+    summary = project_summaries.get(project_id)
+    if summary is not None:
+        return summary
+
+    now = datetime.utcnow()
+    pipeline = [
+        {"$match": {"project_id": project_id}},
+        {"$facet": {
+            "by_status": [{"$group": {"_id": "$status", "count": {"$sum": 1}}}],
+            "by_assignee": [
+                {"$group": {"_id": "$assignee", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}},
+            ],
+            "open_by_age": [
+                {"$match": {"status": {"$ne": "Done"}}},
+                {"$group": {"_id": {"$switch": {
+                    "branches": [
+                        {"case": {"$gte": ["$created_at", now - timedelta(days=1)]}, "then": "<1d"},
+                        {"case": {"$gte": ["$created_at", now - timedelta(days=7)]}, "then": "1-7d"},
+                        {"case": {"$gte": ["$created_at", now - timedelta(days=30)]}, "then": "7-30d"},
+                    ],
+                    "default": ">30d",
+                }}, "count": {"$sum": 1}}},
+            ],
+            "recent": [{"$sort": {"updated_at": -1, "_id": -1}}, {"$limit": RECENT_ISSUES}],
+        }},
+    ]
+    result = await read_db.issues.aggregate(pipeline).to_list(length=1)
+    facets = result[0]
+
+    by_status = {g["_id"]: g["count"] for g in facets["by_status"]}
+    open_by_age = {"<1d": 0, "1-7d": 0, "7-30d": 0, ">30d": 0}
+    open_by_age.update({g["_id"]: g["count"] for g in facets["open_by_age"]})
+    summary = {
+        "project_id": project_id,
+        "total": sum(by_status.values()),
+        "by_status": by_status,
+        "by_assignee": [{"assignee": g["_id"], "count": g["count"]} for g in facets["by_assignee"]],
+        "open_by_age": open_by_age,
+        "recent": [issue_out(i, project_key=project["key"]) for i in facets["recent"]],
+        "generated_at": now,
+    }
+    project_summaries.set(project_id, summary)
+    return summary
+
+
+# Project activity, newest first
+@router.get("/{project_id}/activity", response_model=List[Activity])
+async def get_project_activity(
+    project_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    issue_id: Optional[str] = None,
+    current_user: str = Depends(get_current_user),
+):
+    project = await get_project_roles(project_id)
+    if current_user not in project["roles"]:
+        raise HTTPException(status_code=403, detail="Not a member of this project")
+
+    query = {"project_id": project_id, **keyset_filter(cursor, "at")}
+    if issue_id:
+        query["issue_id"] = issue_id
+    events = await read_db.activity.find(query).sort([("at", -1), ("_id", -1)]).limit(limit).to_list(length=limit)
+
+    headers = {}
+    if len(events) == limit:
+        headers["X-Next-Cursor"] = encode_cursor(events[-1]["at"], events[-1]["_id"])
+    return FastJSONResponse([activity_out(e) for e in events], headers=headers)
 
 # Update project
 @router.put("/{project_id}", response_model=ProjectOut)
 async def update_project(project_id: str, data: ProjectCreate, current_user: str = Depends(get_current_user)):
     try:
-        project = await db.projects.find_one({"_id": ObjectId(project_id)})
-        if not project:
-            raise HTTPException(status_code=404, detail="Project not found")
-
-        # Only Admins can update project
-        admin = next((m for m in project["members"] if m["email"] == current_user and m["role"] == "Admin"), None)
-        if not admin:
-            raise HTTPException(status_code=403, detail="Only Admins can update project")
-
-        # Prevent duplicate key (if changing)
-        if project["key"] != data.key.upper():
-            existing = await db.projects.find_one({"key": data.key.upper()})
-            if existing:
-                raise HTTPException(status_code=400, detail="Project key already exists")
-
         update_data = {
             "name": data.name,
             "key": data.key.upper(),
@@ -216,39 +271,49 @@ async def update_project(project_id: str, data: ProjectCreate, current_user: str
             "type": data.type,
         }
 
-        await db.projects.update_one({"_id": ObjectId(project_id)}, {"$set": update_data})
-
-        updated = await db.projects.find_one({"_id": ObjectId(project_id)})
-        updated["_id"] = str(updated["_id"])
-        return {
-            "id": updated["_id"],
-            "name": updated["name"],
-            "key": updated["key"],
-            "description": updated.get("description"),
-            "type": updated["type"],
-            "owner": updated["owner"],
-            "members": updated.get("members", []),
-            "created_at": updated["created_at"],
-        }
+        # Only Admins can update project; the unique index on key rejects duplicates
+        try:
+            before = await db.projects.find_one_and_update(
+                {"_id": ObjectId(project_id), **ACTIVE, "members": {"$elemMatch": {"email": current_user, "role": "Admin"}}},
+                {"$set": update_data, "$inc": {"version": 1}},
+                return_document=ReturnDocument.BEFORE,
+            )
+        except DuplicateKeyError:
+            raise HTTPException(status_code=400, detail="Project key already exists")
+        project_roles.invalidate(project_id)
+        if not before:
+            await require_admin(project_id, current_user, "Only Admins can update project")
+            raise HTTPException(status_code=409, detail="Project changed concurrently, please retry")
+        project_ids.invalidate(before["key"])
+        project_ids.invalidate(update_data["key"])
+
+        return project_out({**before, **update_data})
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update project: {str(e)}")
 
 
-# Delete project
-@router.delete("/{project_id}")
+# Delete project: issues are removed in the background, see GET /{project_id}/deletion
+@router.delete("/{project_id}", status_code=202, response_model=ProjectDeletion)
 async def delete_project(project_id: str, current_user: str = Depends(get_current_user)):
     try:
-        project = await db.projects.find_one({"_id": ObjectId(project_id)})
-        if not project:
+        # Only Admins can delete project; checked in the update itself, not against the cached roles
+        job = await project_deletions.schedule(project_id, current_user)
+        if job is None:
+            project_roles.invalidate(project_id)
+            await require_admin(project_id, current_user, "Only Admins can delete project")
             raise HTTPException(status_code=404, detail="Project not found")
-
-        # Only Admins can delete project
-        admin = next((m for m in project["members"] if m["email"] == current_user and m["role"] == "Admin"), None)
-        if not admin:
-            raise HTTPException(status_code=403, detail="Only Admins can delete project")
-
-        await db.projects.delete_one({"_id": ObjectId(project_id)})
-        return {"message": "Project deleted successfully"}
+        return deletion_out(job)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete project: {str(e)}")
 
+# Deletion progress
+@router.get("/{project_id}/deletion", response_model=ProjectDeletion)
+async def get_project_deletion(project_id: str, current_user: str = Depends(get_current_user)):
+    job = await db.project_deletions.find_one({"_id": project_id, "members": current_user})
+    if not job:
+        raise HTTPException(status_code=404, detail="No deletion found for this project")
+    return deletion_out(job)
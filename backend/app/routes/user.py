@@ -1,6 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
-from ..database import db
+from fastapi import APIRouter, Depends, HTTPException, Query
+from ..database import db, read_db
 from ..utils import get_current_user
+from ..cache import ACTIVE
+from ..models.issue import IssueOut
+from ..serializers import ISSUE_FIELDS, FastJSONResponse, issue_out
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, KEYSET_SORT, encode_cursor, keyset_filter
+from typing import List, Optional
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -14,3 +19,48 @@ async def get_me(current_user: str = Depends(get_current_user)):
         return user
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch user: {str(e)}")
+
+# Issues assigned to or reported by the caller, across all of their projects
+@router.get("/me/issues", response_model=List[IssueOut])
+async def my_issues(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    relation: str = Query("any", pattern="^(any|assigned|reported)$"),
+    current_user: str = Depends(get_current_user),
+):
+    # One branch per relation so each is served by its own (user, updated_at, _id)
+    # index and merged in sort order
+    branch = keyset_filter(cursor)
+    if status:
+        branch["status"] = status
+    branches = []
+    if relation in ("any", "assigned"):
+        branches.append({"assignee": current_user, **branch})
+    if relation in ("any", "reported"):
+        branches.append({"reporter": current_user, **branch})
+
+    pipeline = [
+        {"$match": {"$or": branches}},
+        {"$sort": dict(KEYSET_SORT)},
+        # Drop issues of projects the caller has since left (or that are being deleted)
+        {"$lookup": {
+            "from": "projects",
+            "let": {"project_id": {"$toObjectId": "$project_id"}},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$_id", "$$project_id"]}, "members.email": current_user, **ACTIVE}},
+                {"$project": {"key": 1}},
+            ],
+            "as": "project",
+        }},
+        {"$match": {"project": {"$ne": []}}},
+        {"$limit": limit},
+        {"$project": {**{f: 1 for f in ISSUE_FIELDS}, "project_key": {"$first": "$project.key"}}},
+    ]
+    issues = await read_db.issues.aggregate(pipeline).to_list(length=limit)
+
+    headers = {}
+    if len(issues) == limit:
+        last = issues[-1]
+        headers["X-Next-Cursor"] = encode_cursor(last["updated_at"], last["_id"])
+    return FastJSONResponse([issue_out(i, project_key=i["project_key"]) for i in issues], headers=headers)
@@ -0,0 +1,45 @@
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+ISSUE_FIELDS = ["project_id", "number", "rank", "title", "description", "status", "reporter", "assignee", "created_at", "updated_at"]
+PROJECT_FIELDS = ["name", "key", "description", "type", "owner", "members", "created_at"]
+ACTIVITY_FIELDS = ["project_id", "at", "actor", "action", "issue_id", "issue_key", "member", "count"]
+DELETION_FIELDS = ["status", "requested_by", "requested_at", "total_issues", "deleted_issues", "finished_at"]
+
+def issue_out(doc: dict, fields=ISSUE_FIELDS, project_key: str | None = None) -> dict:
+    out = {"id": str(doc["_id"]), **{f: doc.get(f) for f in fields}}
+    if project_key and doc.get("number") is not None:
+        out["key"] = f"{project_key}-{doc['number']}"
+    return out
+
+def project_out(doc: dict) -> dict:
+    out = {"id": str(doc["_id"]), **{f: doc.get(f) for f in PROJECT_FIELDS}}
+    if out["members"] is None:
+        out["members"] = []
+    return out
+
+def activity_out(doc: dict) -> dict:
+    return {"id": str(doc["_id"]), **{f: doc.get(f) for f in ACTIVITY_FIELDS}, "changes": doc.get("changes", {})}
+
+def deletion_out(job: dict) -> dict:
+    return {"project_id": job["_id"], **{f: job.get(f) for f in DELETION_FIELDS}}
+
+def _default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=_default)
+
+class FastJSONResponse(JSONResponse):
+    """orjson-encoded response; datetimes and ObjectIds are handled natively.
+
+    Routes that build their body straight from database documents return this
+    directly, which skips FastAPI's response_model validation pass. The
+    response_model is still declared on those routes for the OpenAPI schema.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,72 @@
+import asyncio
+from prometheus_client import Counter
+
+SINGLEFLIGHT_CALLS = Counter(
+    "sprintium_singleflight_calls_total", "Coalesced reads; shared calls reused another caller's in-flight query",
+    ["name", "outcome"],
+)
+
+class Shared:
+    """Result of a coalesced read plus its serialized forms, rendered once per visibility."""
+
+    __slots__ = ("value", "_bodies")
+
+    def __init__(self, value):
+        self.value = value
+        self._bodies = {}
+
+    def body(self, visibility, render) -> bytes:
+        body = self._bodies.get(visibility)
+        if body is None:
+            body = self._bodies[visibility] = render()
+        return body
+
+class SingleFlight:
+    """Concurrent calls with the same key share one execution of `fn`.
+
+    Only calls that overlap are merged, and the key is forgotten as soon as the
+    leader's query finishes. A caller that joins still gets the result of a query
+    that started before it arrived, which may predate the caller's own writes;
+    keys that must reflect them have to include a version read beforehand.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key, fn) -> Shared:
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            SINGLEFLIGHT_CALLS.labels(self.name, "leader").inc()
+            task = asyncio.ensure_future(self._run(fn))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.shared += 1
+            SINGLEFLIGHT_CALLS.labels(self.name, "shared").inc()
+        # A caller that disconnects must not cancel the query for everyone else
+        return await asyncio.shield(task)
+
+    @staticmethod
+    async def _run(fn) -> Shared:
+        return Shared(await fn())
+
+    def _done(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()   # retrieved here in case every waiter went away
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "in_flight": len(self._inflight),
+            "coalescing_ratio": self.shared / self.calls if self.calls else 0.0,
+        }
+
+project_reads = SingleFlight("get_project")
+issue_list_reads = SingleFlight("list_issues")
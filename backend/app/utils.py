@@ -2,10 +2,32 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
 from jose import JWTError, jwt
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
 import os
+import time
+import uuid
 from datetime import datetime, timedelta
+from .cache import TTLCache
+from .revocation import revocations
+from .metrics import timed
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt work factor; hashes below it are upgraded on the next successful login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Hashing runs on its own small pool so it never blocks the event loop; once
+# HASH_MAX_PENDING calls are queued or running, new ones are rejected with 503.
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", "64"))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+)
+hash_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="bcrypt")
+hash_pending = 0
 
 SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey")
 ALGORITHM = "HS256"
@@ -14,45 +36,84 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 RESET_SECRET_KEY = os.getenv("RESET_SECRET_KEY", "superresetkey")
 RESET_EXPIRE_MINUTES = 15
 
+# Decoded access-token claims keyed by token hash, each kept until the token's exp
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+token_claims = TTLCache(TOKEN_CACHE_SIZE, ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+async def run_hashing(fn, *args):
+    global hash_pending
+    if hash_pending >= HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server busy, please retry",
+            headers={"Retry-After": "1"},
+        )
+    hash_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(hash_executor, fn, *args)
+    finally:
+        hash_pending -= 1
+
+def hash_pool_stats() -> dict:
+    return {"workers": HASH_WORKERS, "pending": hash_pending, "max_pending": HASH_MAX_PENDING}
+
+async def hash_password(password: str) -> str:
+    return await run_hashing(timed("bcrypt_hash", pwd_context.hash), password)
 
-def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+async def verify_password(plain: str, hashed: str) -> bool:
+    return await run_hashing(timed("bcrypt_verify", pwd_context.verify), plain, hashed)
+
+async def verify_and_update_password(plain: str, hashed: str):
+    """Returns (valid, new_hash); new_hash is set when the stored hash is out of date."""
+    return await run_hashing(timed("bcrypt_verify", pwd_context.verify_and_update), plain, hashed)
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    now = datetime.utcnow()
+    expire = now + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    to_encode.update({"iat": now, "exp": expire, "jti": uuid.uuid4().hex})
+    return timed("jwt_encode", jwt.encode)(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 def decode_token(token: str):
-    try:
-        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    except JWTError:
-        return None
-    
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_claims.get(key)
+    if payload is None:
+        try:
+            payload = timed("jwt_decode", jwt.decode)(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            return None
+        ttl = payload.get("exp", 0) - time.time()
+        if ttl > 0:
+            token_claims.set(key, payload, ttl=ttl)
+    return payload
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-        return email
-    except JWTError:
+async def get_token_claims(token: str = Depends(oauth2_scheme)):
+    payload = decode_token(token)
+    if payload is None or payload.get("sub") is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    
+    if await revocations.is_revoked(payload.get("jti")):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked")
+    # tokens minted before iat was added are assumed to have had the default lifetime
+    issued_at = payload.get("iat", payload.get("exp", 0) - ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+    if await revocations.is_subject_revoked(payload["sub"], issued_at):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked")
+    return payload
+
+async def get_current_user(claims: dict = Depends(get_token_claims)):
+    return claims["sub"]
+
 def create_reset_token(email: str):
     expire = datetime.utcnow() + timedelta(minutes=RESET_EXPIRE_MINUTES)
-    to_encode = {"sub": email, "exp": expire}
+    to_encode = {"sub": email, "exp": expire, "jti": uuid.uuid4().hex}
     return jwt.encode(to_encode, RESET_SECRET_KEY, algorithm=ALGORITHM)
 
-def verify_reset_token(token: str):
+async def verify_reset_token(token: str):
     try:
         payload = jwt.decode(token, RESET_SECRET_KEY, algorithms=[ALGORITHM])
-        return payload.get("sub")
     except:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid or expired reset token")
+    if await revocations.is_revoked(payload.get("jti")):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Reset token has already been used")
+    return payload
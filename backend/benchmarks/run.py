@@ -0,0 +1,207 @@
+"""
+API latency benchmark.
+
+Seeds a synthetic dataset, drives the real FastAPI app in-process through an
+ASGI client and prints per-route throughput and latency percentiles as JSON.
+
+    # from backend/, against a throwaway database on a local mongod
+    python benchmarks/run.py --mongo-uri mongodb://localhost:27017 --db sprintium_bench
+
+    # or with no server at all
+    python benchmarks/run.py --backend mongomock --issues 2000 --output before.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STATUSES = ["To Do", "In Progress", "Done"]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["mongod", "mongomock"], default="mongod")
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="sprintium_bench", help="database to seed; it is dropped first")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--members", type=int, default=10, help="members per project")
+    parser.add_argument("--issues", type=int, default=1000, help="issues per project")
+    parser.add_argument("--requests", type=int, default=200, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    return parser.parse_args()
+
+def load_app(args):
+    # The app reads its settings at import time, so configure before importing it
+    os.environ["MONGO_URI"] = args.mongo_uri
+    os.environ["MONGO_DB"] = args.db
+    # Every simulated user shares one client address; measure the app, not the rate limits
+    os.environ.setdefault("ADMISSION_RULES", "[]")
+    from app import database
+    if args.backend == "mongomock":
+        from mongomock_motor import AsyncMongoMockClient
+        database.connect(AsyncMongoMockClient())
+    from app.main import app
+    return app, database.db
+
+async def seed(db, args, rng):
+    from bson import ObjectId
+    from app.indexes import ensure_indexes
+    from app.ranking import rank_between
+    from app.utils import hash_password
+
+    for name in await db.list_collection_names():
+        await db.drop_collection(name)
+    await ensure_indexes(db)
+
+    password_hash = await hash_password("benchmark")
+    users = [f"user{n}@bench.example.com" for n in range(args.users)]
+    await db.users.insert_many([
+        {"username": f"user{n}", "email": email, "password": password_hash}
+        for n, email in enumerate(users)
+    ])
+
+    now = datetime.utcnow()
+    projects = []
+    for n in range(args.projects):
+        members = rng.sample(users, min(args.members, len(users)))
+        project_id = ObjectId()
+        projects.append({
+            "_id": project_id,
+            "name": f"Project {n}",
+            "key": f"B{n}",
+            "description": None,
+            "type": "software",
+            "owner": members[0],
+            "members": [{"email": m, "role": "Admin" if i == 0 else rng.choice(["Member", "Viewer"])} for i, m in enumerate(members)],
+            "created_at": now,
+            "issue_seq": args.issues,
+        })
+        issues = []
+        ranks = dict.fromkeys(STATUSES)
+        for i in range(args.issues):
+            created = now - timedelta(minutes=rng.randint(0, 60 * 24 * 60))
+            # same draw order as before ranks existed, so a seed keeps producing the same dataset
+            description = "Synthetic benchmark issue " * rng.randint(1, 8)
+            status = rng.choice(STATUSES)
+            ranks[status] = rank_between(ranks[status], None)
+            issues.append({
+                "project_id": str(project_id),
+                "number": i + 1,
+                "rank": ranks[status],
+                "title": f"Issue {i} in project {n}",
+                "description": description,
+                "status": status,
+                "reporter": rng.choice(members),
+                "assignee": rng.choice(members + [None]),
+                "created_at": created,
+                "updated_at": created + timedelta(minutes=rng.randint(0, 600)),
+            })
+        for start in range(0, len(issues), 1000):
+            await db.issues.insert_many(issues[start:start + 1000])
+    if projects:
+        await db.projects.insert_many(projects)
+    return projects
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+async def measure(client, make_request, total, concurrency):
+    latencies = []
+    errors = 0
+    queue = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for n in queue:
+            method, url, kwargs = make_request(n)
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "min": round(latencies[0], 3),
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "max": round(latencies[-1], 3),
+            "mean": round(sum(latencies) / len(latencies), 3),
+        },
+    }
+
+async def main():
+    import httpx
+
+    args = parse_args()
+    if args.db == "sprintium":
+        sys.exit("Refusing to seed the application database; pass a different --db")
+    rng = random.Random(args.seed)
+    app, db = load_app(args)
+    from app.utils import create_access_token
+
+    async with app.router.lifespan_context(app):
+        projects = await seed(db, args, rng)
+        # (project_id, member email, auth header) triples to spread requests over
+        callers = []
+        for p in projects:
+            for m in p["members"]:
+                token = create_access_token({"sub": m["email"]})
+                callers.append((str(p["_id"]), m["email"], {"Authorization": f"Bearer {token}"}))
+
+        def caller(n):
+            return callers[n % len(callers)]
+
+        routes = {
+            "GET /projects": lambda n: ("GET", "/projects/", {"headers": caller(n)[2]}),
+            "GET /projects/{project_id}": lambda n: ("GET", f"/projects/{caller(n)[0]}", {"headers": caller(n)[2]}),
+            "GET /projects/{project_id}/issues": lambda n: ("GET", f"/projects/{caller(n)[0]}/issues/", {"headers": caller(n)[2]}),
+            "GET /projects/{project_id}/summary": lambda n: ("GET", f"/projects/{caller(n)[0]}/summary", {"headers": caller(n)[2]}),
+            "GET /users/me": lambda n: ("GET", "/users/me", {"headers": caller(n)[2]}),
+            "POST /auth/login": lambda n: ("POST", "/auth/login", {"json": {"email": caller(n)[1], "password": "benchmark"}}),
+        }
+
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        report = {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "environment": {"python": platform.python_version(), "platform": platform.platform(), "backend": args.backend},
+            "config": {k: v for k, v in vars(args).items() if k not in ("output", "mongo_uri")},
+            "routes": {},
+        }
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name, make_request in routes.items():
+                # one unmeasured pass to warm caches and connection pools
+                await measure(client, make_request, min(args.concurrency, args.requests), args.concurrency)
+                report["routes"][name] = await measure(client, make_request, args.requests, args.concurrency)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,11 +1,93 @@
 # run_server.py
+#
+#   python run_server.py          # development: one process, auto-reload, localhost only
+#   python run_server.py --prod   # production: gunicorn master + one uvicorn worker per core
+#
+# In production `kill -HUP <master>` restarts the workers gracefully and
+# `kill -TERM <master>` drains in-flight requests for --graceful-timeout seconds.
 
-import uvicorn
+import argparse
+import os
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the Sprintium backend")
+    parser.add_argument("--prod", action="store_true", help="run the multi-worker production server")
+    parser.add_argument("--host", default=os.getenv("HOST"), help="bind address (default 127.0.0.1, or 0.0.0.0 with --prod)")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)))
+    parser.add_argument("--keep-alive", type=int, default=int(os.getenv("KEEP_ALIVE", "5")), help="seconds to hold idle connections")
+    parser.add_argument("--backlog", type=int, default=int(os.getenv("BACKLOG", "2048")), help="pending connection queue size")
+    parser.add_argument("--timeout", type=int, default=int(os.getenv("WORKER_TIMEOUT", "60")), help="restart workers silent for this long")
+    parser.add_argument("--graceful-timeout", type=int, default=int(os.getenv("GRACEFUL_TIMEOUT", "30")))
+    parser.add_argument("--max-requests", type=int, default=int(os.getenv("MAX_REQUESTS", "0")), help="recycle workers after this many requests (0: never)")
+    parser.add_argument("--preload", action=argparse.BooleanOptionalAction, default=True, help="import the app once in the master before forking")
+    return parser.parse_args()
+
+def run_dev(args):
+    import uvicorn
 
-if __name__ == "__main__":
     uvicorn.run(
         "app.main:app",   # import path: module:object
-        host="127.0.0.1",   # accessible from network (use "127.0.0.1" for local only)
-        port=8000,
+        host=args.host or "127.0.0.1",   # use "0.0.0.0" to accept connections from the network
+        port=args.port,
         reload=True       # auto-reload on code changes (for development)
     )
+
+def post_fork(server, worker):
+    # With --preload the master imported the app; drop anything it may have
+    # built so each worker opens its own Mongo client in the lifespan and
+    # starts with empty caches.
+    from app import database
+    from app.cache import project_roles, project_summaries
+    from app.utils import token_claims
+
+    database.client = None
+    project_roles.clear()
+    project_summaries.clear()
+    token_claims.clear()
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+def run_prod(args):
+    from gunicorn.app.base import BaseApplication
+    from uvicorn_worker import UvicornWorker
+
+    class Worker(UvicornWorker):
+        CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools", "lifespan": "on"}
+
+    class Server(BaseApplication):
+        def load_config(self):
+            options = {
+                "bind": f"{args.host or '0.0.0.0'}:{args.port}",
+                "workers": args.workers,
+                "worker_class": Worker,
+                "keepalive": args.keep_alive,
+                "backlog": args.backlog,
+                "timeout": args.timeout,
+                "graceful_timeout": args.graceful_timeout,
+                "max_requests": args.max_requests,
+                "max_requests_jitter": args.max_requests // 10,
+                "preload_app": args.preload,
+                "post_fork": post_fork,
+                "child_exit": child_exit,
+                "accesslog": "-",
+                "errorlog": "-",
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app.main import app
+            return app
+
+    Server().run()
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.prod:
+        run_prod(args)
+    else:
+        run_dev(args)
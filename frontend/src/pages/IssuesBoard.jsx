@@ -3,6 +3,10 @@ import { useParams } from "react-router-dom";
 import axios from "axios";
 import { toast } from "react-toastify";
 
+const STATUSES = ["To Do", "In Progress", "Done"];
+// Largest page the API serves (MAX_PAGE_SIZE in backend/app/pagination.py)
+const PAGE_SIZE = 500;
+
 const IssuesBoard = () => {
   const { projectId } = useParams();
   const [issues, setIssues] = useState([]);
@@ -14,16 +18,29 @@ const IssuesBoard = () => {
   const [showForm, setShowForm] = useState(false);
   const [role, setRole] = useState("Viewer");
 
-  const fetchIssues = async () => {
-    try {
-      const token = localStorage.getItem("token");
+  // One column in board order; columns load in parallel
+  const fetchColumn = async (status, token) => {
+    const column = [];
+    let cursor = null;
+    do {
       const res = await axios.get(
         `${import.meta.env.VITE_API_URL}/projects/${projectId}/issues`,
         {
           headers: { Authorization: `Bearer ${token}` },
+          params: { status, sort: "rank", limit: PAGE_SIZE, ...(cursor ? { cursor } : {}) },
         }
       );
-      setIssues(res.data);
+      column.push(...res.data);
+      cursor = res.headers["x-next-cursor"];
+    } while (cursor);
+    return column;
+  };
+
+  const fetchIssues = async () => {
+    try {
+      const token = localStorage.getItem("token");
+      const columns = await Promise.all(STATUSES.map((status) => fetchColumn(status, token)));
+      setIssues(columns.flat());
     } catch (err) {
       console.error(err);
       toast.error("Failed to load issues");
@@ -93,11 +110,9 @@ const IssuesBoard = () => {
     }
   };
 
-  const grouped = {
-    "To Do": issues.filter((i) => i.status === "To Do"),
-    "In Progress": issues.filter((i) => i.status === "In Progress"),
-    Done: issues.filter((i) => i.status === "Done"),
-  };
+  const grouped = Object.fromEntries(
+    STATUSES.map((status) => [status, issues.filter((i) => i.status === status)])
+  );
 
   return (
     <div className="container-fluid py-4 bg-light min-vh-100">